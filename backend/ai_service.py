@@ -1,20 +1,152 @@
 import os
 import google.generativeai as genai
-from typing import Dict, List, Optional
-from dataclasses import dataclass
-import json
+from typing import Dict, List, Optional, Tuple
+from dataclasses import dataclass, replace
+from collections import OrderedDict
+from functools import lru_cache
+import orjson
+import re
 import time
 from sentence_transformers import SentenceTransformer
+import torch
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.feature_extraction.text import HashingVectorizer
+import ahocorasick
 import logging
 from dotenv import load_dotenv
 
+from backend.embedding_worker import EmbeddingWorker
+
+try:
+    import simsimd
+    SIMSIMD_AVAILABLE = True
+except ImportError:
+    SIMSIMD_AVAILABLE = False
+
 # Environment variables are loaded in main.py
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Rule-based analysis keywords
+NEGATIVE_KEYWORDS = [
+    'lawsuit', 'fine', 'penalty', 'scandal', 'violation', 'illegal',
+    'layoffs', 'discrimination', 'pollution', 'breach', 'fraud',
+    'investigation', 'charges', 'misconduct', 'abuse', 'exploit'
+]
+
+POSITIVE_KEYWORDS = [
+    'commitment', 'pledge', 'promise', 'value', 'ethical', 'responsible',
+    'sustainable', 'inclusive', 'transparent', 'integrity', 'compliance'
+]
+
+_WORD_RE = re.compile(r'\w+')
+
+# Built once; HashingVectorizer is stateless so it is safe to share. Lowercasing
+# happens inside the vectorizer before the compiled tokenizer runs.
+_HASHING_VECTORIZER = HashingVectorizer(
+    n_features=2**14,
+    alternate_sign=False,
+    tokenizer=_WORD_RE.findall,
+    token_pattern=None
+)
+
+def _build_automaton(keywords: List[str]) -> ahocorasick.Automaton:
+    """Compile keywords into an Aho-Corasick automaton"""
+    automaton = ahocorasick.Automaton()
+    for keyword in keywords:
+        automaton.add_word(keyword, keyword)
+    automaton.make_automaton()
+    return automaton
+
+def _cosine_similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Cosine similarity of two L2-normalized 1-D float32 vectors"""
+    if SIMSIMD_AVAILABLE:
+        # SimSIMD returns cosine distance
+        return 1.0 - float(simsimd.cosine(a, b))
+
+    # Vectors are normalized at encode time, so cosine is a single dot product
+    return float(a @ b)
+
+def _configure_torch_threads():
+    """Use every core for intra-op parallelism; encode calls are not run concurrently"""
+    torch.set_num_threads(os.cpu_count() or 1)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Can only be set before any inter-op parallel work has started
+        pass
+
+def _load_embedding_model() -> SentenceTransformer:
+    """Load MiniLM with the fastest backend available"""
+    if torch.cuda.is_available():
+        # FP16 halves matmul work with negligible effect on cosine scores
+        return SentenceTransformer('all-MiniLM-L6-v2', device='cuda').half()
+
+    try:
+        # Graph-optimized ONNX export shipped with the model
+        return SentenceTransformer(
+            'all-MiniLM-L6-v2',
+            backend='onnx',
+            model_kwargs={'file_name': 'onnx/model_O3.onnx'}
+        )
+    except Exception as e:
+        logger.warning(f"ONNX backend unavailable, using PyTorch: {e}")
+        return SentenceTransformer('all-MiniLM-L6-v2')
+
+def _load_worker_model() -> SentenceTransformer:
+    """Model loader run inside the embedding worker process"""
+    _configure_torch_threads()
+    return _load_embedding_model()
+
+@lru_cache(maxsize=1024)
+def _truncate_text(text: str, max_length: int) -> str:
+    """Truncate text to specified length"""
+    # The same promises/actions are excerpted for every query on a company
+    if not text or len(text) <= max_length:
+        return text or ""
+    return text[:max_length] + "..."
+
+class _JSONObjectScanner:
+    """Incrementally find the first balanced {...} object in streamed text"""
+
+    def __init__(self):
+        self._buffer: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._started = False
+
+    def feed(self, text: str) -> Optional[str]:
+        """Consume a chunk; return the object text once its braces balance"""
+        start = 0
+        for i, char in enumerate(text):
+            if not self._started:
+                if char != '{':
+                    continue
+                self._started = True
+                start = i
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == '{':
+                self._depth += 1
+            elif char == '}':
+                self._depth -= 1
+                if self._depth == 0:
+                    self._buffer.append(text[start:i + 1])
+                    return ''.join(self._buffer)
+
+        if self._started:
+            self._buffer.append(text[start:])
+        return None
+
 @dataclass
 class ContradictionResult:
     company: str
@@ -27,10 +159,81 @@ class ContradictionResult:
     key_contradictions: List[str]
     timestamp: int
 
+def _quantize_int8(embedding: np.ndarray) -> np.ndarray:
+    """Scale a vector into int8 by its max magnitude"""
+    max_abs = float(np.abs(embedding).max())
+    if max_abs == 0:
+        return np.zeros(embedding.shape, dtype=np.int8)
+    return np.round(embedding * (127.0 / max_abs)).astype(np.int8)
+
+def _int8_cosine(matrix: np.ndarray, vector: np.ndarray) -> np.ndarray:
+    """Cosine similarity of each int8 row of matrix against an int8 vector"""
+    if SIMSIMD_AVAILABLE:
+        return 1.0 - np.asarray(simsimd.cdist(vector.reshape(1, -1), matrix, metric='cosine')).ravel()
+
+    # Per-vector scales differ, so normalize the int32 dot products explicitly
+    rows = matrix.astype(np.int32)
+    query = vector.astype(np.int32)
+    dots = rows @ query
+    norms = np.linalg.norm(rows, axis=1) * np.linalg.norm(query)
+    return np.divide(dots, norms, out=np.zeros(len(dots)), where=norms > 0)
+
+class SemanticCache:
+    """In-memory cache of analysis results, matched on embedding similarity"""
+
+    def __init__(self, threshold: float = 0.95, max_keys: int = 256, max_entries_per_key: int = 16):
+        self.threshold = threshold
+        self.max_keys = max_keys
+        self.max_entries_per_key = max_entries_per_key
+        # (company, query) -> (stacked int8-quantized embeddings, results)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[np.ndarray, List[ContradictionResult]]]" = OrderedDict()
+
+    def lookup(self, company: str, query: str, embedding: np.ndarray) -> Optional[ContradictionResult]:
+        """Return the cached result closest to embedding if it clears the threshold"""
+        key = (company, query)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        matrix, results = entry
+        if matrix.shape[1] != embedding.shape[0]:
+            return None
+
+        scores = _int8_cosine(matrix, _quantize_int8(embedding))
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None
+
+        self._entries.move_to_end(key)
+        return replace(results[best], timestamp=int(time.time()))
+
+    def add(self, company: str, query: str, embedding: np.ndarray, result: ContradictionResult):
+        """Store a result under (company, query) with its embedding"""
+        key = (company, query)
+        row = _quantize_int8(embedding).reshape(1, -1)
+        entry = self._entries.get(key)
+
+        if entry is None or entry[0].shape[1] != row.shape[1]:
+            matrix, results = row, [result]
+        else:
+            matrix = np.vstack([entry[0], row])[-self.max_entries_per_key:]
+            results = (entry[1] + [result])[-self.max_entries_per_key:]
+
+        self._entries[key] = (matrix, results)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_keys:
+            self._entries.popitem(last=False)
+
 class GeminiAIService:
     def __init__(self):
         self.setup_gemini()
-        self.setup_embeddings()
+        # Embedding model is loaded lazily on first use
+        self._embedding_model = None
+        self._embedding_worker = None
+        self._embeddings_initialized = False
+        self.analysis_cache = SemanticCache()
+        self.negative_automaton = _build_automaton(NEGATIVE_KEYWORDS)
+        self.positive_automaton = _build_automaton(POSITIVE_KEYWORDS)
 
     def setup_gemini(self):
         """Initialize Gemini API"""
@@ -50,63 +253,100 @@ class GeminiAIService:
             logger.error(f"Failed to initialize Gemini: {e}")
             self.gemini_enabled = False
 
+    @property
+    def embedding_model(self) -> Optional[SentenceTransformer]:
+        """Embedding model, loaded on first access"""
+        if not self._embeddings_initialized:
+            self.setup_embeddings()
+        return self._embedding_model
+
+    @property
+    def embeddings_enabled(self) -> bool:
+        """Whether real embeddings are available, in-process or via the worker"""
+        return self.embedding_model is not None or self._embedding_worker is not None
+
     def setup_embeddings(self):
         """Initialize free embedding model"""
+        self._embeddings_initialized = True
+
+        if os.getenv("EMBEDDING_WORKER", "").lower() in ("1", "true", "yes"):
+            try:
+                # Batch concurrent requests through a dedicated model process
+                self._embedding_worker = EmbeddingWorker(_load_worker_model)
+                return
+            except Exception as e:
+                logger.error(f"Failed to start embedding worker, loading in-process: {e}")
+                self._embedding_worker = None
+
+        _configure_torch_threads()
+
         try:
             # Using sentence-transformers with a free model
-            self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+            self._embedding_model = _load_embedding_model()
             logger.info("Embedding model loaded successfully")
         except Exception as e:
             logger.error(f"Failed to load embedding model: {e}")
-            self.embedding_model = None
+            self._embedding_model = None
+
+    def close(self):
+        """Stop the embedding worker process, if one was started"""
+        if self._embedding_worker is not None:
+            self._embedding_worker.close()
+            self._embedding_worker = None
 
     def get_embeddings(self, texts: List[str]) -> np.ndarray:
-        """Generate embeddings for texts"""
-        if not self.embedding_model:
+        """Generate L2-normalized embeddings for texts"""
+        embeddings = self._model_embeddings(texts)
+        if embeddings is None:
             # Fallback: simple word counting vectors
-            return self._simple_embeddings(texts)
+            return self._simple_embeddings(texts).astype(np.float32)
+        return embeddings
+
+    def _model_embeddings(self, texts: List[str]) -> Optional[np.ndarray]:
+        """Sentence-transformer embeddings, or None when the model is unavailable or fails"""
+        if not self.embeddings_enabled:
+            return None
 
         try:
-            return self.embedding_model.encode(texts)
+            if self._embedding_worker is not None:
+                return self._embedding_worker.encode(texts)
+
+            with torch.inference_mode():
+                return self.embedding_model.encode(texts, normalize_embeddings=True).astype(np.float32)
         except Exception as e:
             logger.error(f"Embedding generation failed: {e}")
-            return self._simple_embeddings(texts)
+            return None
 
     def _simple_embeddings(self, texts: List[str]) -> np.ndarray:
-        """Fallback embedding method using word frequencies"""
-        from collections import Counter
-        import re
-
-        # Create vocabulary from all texts
-        all_words = set()
-        processed_texts = []
-
-        for text in texts:
-            words = re.findall(r'\w+', text.lower())
-            processed_texts.append(words)
-            all_words.update(words)
-
-        vocab = list(all_words)
-        embeddings = []
-
-        for words in processed_texts:
-            word_counts = Counter(words)
-            vector = [word_counts.get(word, 0) for word in vocab]
-            embeddings.append(vector)
-
-        return np.array(embeddings)
+        """Fallback embedding method using hashed word frequencies"""
+        # Stateless, so no vocabulary pass; rows come back L2-normalized
+        return _HASHING_VECTORIZER.transform(texts).toarray().astype(np.float32)
 
     def analyze_contradiction(self, company: str, query: str, promises: str, actions: str) -> ContradictionResult:
         """Main contradiction analysis method"""
 
+        # One encode serves both the cache key and the fallback's similarity score
+        embeddings = self._model_embeddings([promises, actions]) if (promises or actions) else None
+        cache_embedding = np.concatenate(embeddings) if embeddings is not None else None
+        if cache_embedding is not None:
+            cached = self.analysis_cache.lookup(company, query, cache_embedding)
+            if cached:
+                logger.info(f"Semantic cache hit for {company}")
+                return cached
+
         if self.gemini_enabled:
             try:
-                return self._analyze_with_gemini(company, query, promises, actions)
+                result = self._analyze_with_gemini(company, query, promises, actions)
             except Exception as e:
                 logger.error(f"Gemini analysis failed: {e}")
-                return self._analyze_with_fallback(company, query, promises, actions)
+                # Don't cache the rule-based stand-in; the next call should retry Gemini
+                return self._analyze_with_fallback(company, query, promises, actions, embeddings)
         else:
-            return self._analyze_with_fallback(company, query, promises, actions)
+            result = self._analyze_with_fallback(company, query, promises, actions, embeddings)
+
+        if cache_embedding is not None:
+            self.analysis_cache.add(company, query, cache_embedding, result)
+        return result
 
     def _analyze_with_gemini(self, company: str, query: str, promises: str, actions: str) -> ContradictionResult:
         """Analyze contradictions using Gemini"""
@@ -144,11 +384,27 @@ Analyze for contradictions between stated values and actual behavior."""
             # Combine system and user prompts for Gemini
             full_prompt = f"{system_prompt}\n\n{user_prompt}"
 
-            response = self.model.generate_content(full_prompt)
-            response_text = response.text
+            # Stream so parsing can start as soon as the JSON object closes
+            response = self.model.generate_content(full_prompt, stream=True)
+            scanner = _JSONObjectScanner()
+            chunks = []
+            json_str = None
+            for chunk in response:
+                chunks.append(chunk.text)
+                json_str = scanner.feed(chunk.text)
+                if json_str is not None:
+                    break
+            response_text = ''.join(chunks)
 
             # Extract JSON from response
-            result_data = self._extract_json_from_response(response_text)
+            result_data = None
+            if json_str is not None:
+                try:
+                    result_data = orjson.loads(json_str)
+                except orjson.JSONDecodeError:
+                    pass
+            if result_data is None:
+                result_data = self._extract_json_from_response(response_text)
 
             return ContradictionResult(
                 company=company,
@@ -156,8 +412,8 @@ Analyze for contradictions between stated values and actual behavior."""
                 contradiction_level=result_data.get('contradiction_level', 'UNKNOWN'),
                 confidence_score=float(result_data.get('confidence_score', 0.5)),
                 analysis=result_data.get('analysis', response_text),
-                promises_excerpt=self._truncate_text(promises, 500),
-                actions_excerpt=self._truncate_text(actions, 500),
+                promises_excerpt=_truncate_text(promises, 500),
+                actions_excerpt=_truncate_text(actions, 500),
                 key_contradictions=result_data.get('key_contradictions', []),
                 timestamp=int(time.time())
             )
@@ -175,12 +431,12 @@ Analyze for contradictions between stated values and actual behavior."""
 
             if start_idx != -1 and end_idx != -1:
                 json_str = response_text[start_idx:end_idx]
-                return json.loads(json_str)
+                return orjson.loads(json_str)
             else:
                 # Fallback parsing
                 return self._parse_response_fallback(response_text)
 
-        except json.JSONDecodeError:
+        except orjson.JSONDecodeError:
             return self._parse_response_fallback(response_text)
 
     def _parse_response_fallback(self, response: str) -> Dict:
@@ -205,10 +461,10 @@ Analyze for contradictions between stated values and actual behavior."""
             confidence = 0.3
 
         # Extract key points as contradictions
+        # lower() keeps '.' in place, so both splits line up sentence for sentence
         contradictions = []
-        sentences = response.split('.')
-        for sentence in sentences:
-            if any(word in sentence.lower() for word in ['contradict', 'inconsistent', 'violate', 'breach']):
+        for sentence, sentence_lower in zip(response.split('.'), response_lower.split('.')):
+            if any(word in sentence_lower for word in ('contradict', 'inconsistent', 'violate', 'breach')):
                 contradictions.append(sentence.strip())
 
         return {
@@ -218,37 +474,28 @@ Analyze for contradictions between stated values and actual behavior."""
             'key_contradictions': contradictions[:3]  # Top 3
         }
 
-    def _analyze_with_fallback(self, company: str, query: str, promises: str, actions: str) -> ContradictionResult:
+    def _analyze_with_fallback(self, company: str, query: str, promises: str, actions: str,
+                               embeddings: Optional[np.ndarray] = None) -> ContradictionResult:
         """Enhanced fallback analysis using embeddings and rule-based detection"""
 
-        # Rule-based analysis
-        negative_keywords = [
-            'lawsuit', 'fine', 'penalty', 'scandal', 'violation', 'illegal',
-            'layoffs', 'discrimination', 'pollution', 'breach', 'fraud',
-            'investigation', 'charges', 'misconduct', 'abuse', 'exploit'
-        ]
-
-        positive_keywords = [
-            'commitment', 'pledge', 'promise', 'value', 'ethical', 'responsible',
-            'sustainable', 'inclusive', 'transparent', 'integrity', 'compliance'
-        ]
-
         actions_lower = actions.lower()
         promises_lower = promises.lower()
 
-        # Count signals
-        negative_signals = sum(1 for keyword in negative_keywords if keyword in actions_lower)
-        positive_signals = sum(1 for keyword in positive_keywords if keyword in promises_lower)
+        # Count signals (one automaton pass per text)
+        negative_hits = {keyword for _, keyword in self.negative_automaton.iter(actions_lower)}
+        positive_hits = {keyword for _, keyword in self.positive_automaton.iter(promises_lower)}
+        negative_signals = len(negative_hits)
+        positive_signals = len(positive_hits)
 
         # Semantic similarity analysis
         similarity_score = 0.5
-        if self.embedding_model and promises and actions:
-            try:
-                promise_embedding = self.get_embeddings([promises])
-                action_embedding = self.get_embeddings([actions])
-                similarity_score = cosine_similarity(promise_embedding, action_embedding)[0][0]
-            except Exception as e:
-                logger.error(f"Similarity calculation failed: {e}")
+        if promises and actions:
+            if embeddings is None:
+                # One forward pass for both texts
+                embeddings = self._model_embeddings([promises, actions])
+            # Hashed fallback vectors say little about meaning, so keep the neutral score without a model
+            if embeddings is not None:
+                similarity_score = _cosine_similarity(embeddings[0], embeddings[1])
 
         # Calculate contradiction level
         contradiction_score = self._calculate_contradiction_score(
@@ -260,12 +507,10 @@ Analyze for contradictions between stated values and actual behavior."""
         )
 
         # Extract key contradictions
-        key_contradictions = []
-        for keyword in negative_keywords:
-            if keyword in actions_lower:
-                key_contradictions.append(f"Actions show evidence of: {keyword}")
-                if len(key_contradictions) >= 3:
-                    break
+        key_contradictions = [
+            f"Actions show evidence of: {keyword}"
+            for keyword in NEGATIVE_KEYWORDS if keyword in negative_hits
+        ][:3]
 
         return ContradictionResult(
             company=company,
@@ -273,8 +518,8 @@ Analyze for contradictions between stated values and actual behavior."""
             contradiction_level=level,
             confidence_score=float(confidence),
             analysis=analysis,
-            promises_excerpt=self._truncate_text(promises, 500),
-            actions_excerpt=self._truncate_text(actions, 500),
+            promises_excerpt=_truncate_text(promises, 500),
+            actions_excerpt=_truncate_text(actions, 500),
             key_contradictions=key_contradictions,
             timestamp=int(time.time())
         )
@@ -314,12 +559,6 @@ Analyze for contradictions between stated values and actual behavior."""
 
         return level, confidence, analysis
 
-    def _truncate_text(self, text: str, max_length: int) -> str:
-        """Truncate text to specified length"""
-        if not text:
-            return ""
-        return text[:max_length] + "..." if len(text) > max_length else text
-
     def get_contradiction_summary(self, results: List[ContradictionResult]) -> Dict:
         """Generate summary of multiple contradiction analyses"""
         if not results:
@@ -327,11 +566,12 @@ Analyze for contradictions between stated values and actual behavior."""
 
         # Calculate overall risk score
         level_weights = {"NONE": 0, "LOW": 0.25, "MEDIUM": 0.5, "HIGH": 1.0}
-        total_score = sum(
-            level_weights.get(result.contradiction_level, 0) * result.confidence_score
-            for result in results
+        count = len(results)
+        levels = np.fromiter(
+            (level_weights.get(r.contradiction_level, 0) for r in results), dtype=np.float64, count=count
         )
-        overall_score = total_score / len(results)
+        confidences = np.fromiter((r.confidence_score for r in results), dtype=np.float64, count=count)
+        overall_score = float((levels * confidences).mean())
 
         # Determine overall risk level
         if overall_score >= 0.7:
@@ -344,16 +584,17 @@ Analyze for contradictions between stated values and actual behavior."""
             risk_level = "MINIMAL"
 
         # Generate summary
-        high_count = sum(1 for r in results if r.contradiction_level == "HIGH")
-        medium_count = sum(1 for r in results if r.contradiction_level == "MEDIUM")
+        # Weights are unique per level, so they double as level labels
+        high_count = int((levels == 1.0).sum())
+        medium_count = int((levels == 0.5).sum())
 
-        summary = f"Analysis of {len(results)} areas found {high_count} high-risk and {medium_count} medium-risk contradictions."
+        summary = f"Analysis of {count} areas found {high_count} high-risk and {medium_count} medium-risk contradictions."
 
         return {
             "overall_score": round(overall_score, 2),
             "risk_level": risk_level,
             "summary": summary,
-            "total_analyses": len(results),
+            "total_analyses": count,
             "high_risk_count": high_count,
             "medium_risk_count": medium_count
         }
\ No newline at end of file
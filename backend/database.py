@@ -1,13 +1,50 @@
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Float, JSON
+from sqlalchemy import create_engine, event, delete, func, select, Column, Index, Integer, String, Text, DateTime, Float, JSON
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.exc import DatabaseError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.orm import sessionmaker, scoped_session, Session
+from sqlalchemy.pool import StaticPool
+from contextlib import contextmanager
 from datetime import datetime, timedelta
+from typing import Optional
+import logging
+import orjson
 import os
 
+logger = logging.getLogger(__name__)
+
 # Database setup
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./hypocrisy_detector.db")
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+engine_options = {
+    # JSON columns (keywords, key_contradictions, alert data) go through orjson
+    "json_serializer": lambda obj: orjson.dumps(obj).decode(),
+    "json_deserializer": orjson.loads,
+}
+if "sqlite" in DATABASE_URL:
+    engine_options["connect_args"] = {"check_same_thread": False}
+    if DATABASE_URL in ("sqlite://", "sqlite:///:memory:"):
+        # Every session must share the one connection that holds the in-memory database
+        engine_options["poolclass"] = StaticPool
+else:
+    engine_options.update(pool_size=10, max_overflow=20, pool_pre_ping=True)
+
+engine = create_engine(DATABASE_URL, **engine_options)
+
+if DATABASE_URL.startswith("sqlite"):
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """Tune each new SQLite connection for concurrent reads and cheap commits"""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA mmap_size=268435456")  # 256 MiB
+        cursor.execute("PRAGMA cache_size=-65536")  # 64 MiB
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+# One session per thread, reused across DatabaseManager calls
+ScopedSession = scoped_session(SessionLocal)
 Base = declarative_base()
 
 # Database Models
@@ -49,6 +86,13 @@ class NewsArticle(Base):
     keywords = Column(JSON)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        Index('ix_news_company_published', company_name, published_at.desc()),
+        # Empty URLs are never treated as duplicates, so leave them out of the unique index
+        Index('ix_news_url_company', url, company_name, unique=True,
+              sqlite_where=url != '', postgresql_where=url != ''),
+    )
+
 class ContradictionAnalysis(Base):
     __tablename__ = "contradiction_analyses"
 
@@ -63,6 +107,10 @@ class ContradictionAnalysis(Base):
     key_contradictions = Column(JSON)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        Index('ix_ca_company_created', company_name, created_at.desc()),
+    )
+
 class Alert(Base):
     __tablename__ = "alerts"
 
@@ -76,9 +124,52 @@ class Alert(Base):
     is_read = Column(Integer, default=0)  # SQLite doesn't have boolean
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        Index('ix_alert_unread', company_name, is_read, created_at.desc()),
+    )
+
 # Create tables
 Base.metadata.create_all(bind=engine)
 
+def _dedupe_news_articles():
+    """Delete repeated (url, company) rows, keeping the oldest, so the unique index can be built"""
+    table = NewsArticle.__table__
+    keep = (
+        select(table.c.url, table.c.company_name, func.min(table.c.id).label('keep_id'))
+        .where(table.c.url != '')
+        .group_by(table.c.url, table.c.company_name)
+        .having(func.count() > 1)
+        .subquery()
+    )
+    duplicates = select(table.c.id).join(
+        keep, (table.c.url == keep.c.url) & (table.c.company_name == keep.c.company_name)
+    ).where(table.c.id != keep.c.keep_id)
+    with engine.begin() as connection:
+        # Read the ids first; MySQL can't delete from a table its own subquery selects from
+        duplicate_ids = connection.execute(duplicates).scalars().all()
+        removed = 0
+        for start in range(0, len(duplicate_ids), 500):
+            removed += connection.execute(
+                delete(table).where(table.c.id.in_(duplicate_ids[start:start + 500]))
+            ).rowcount
+    logger.info(f"Removed {removed} duplicate news articles before indexing")
+
+# create_all skips indexes on tables that already exist, so add them explicitly
+for table in (NewsArticle.__table__, ContradictionAnalysis.__table__, Alert.__table__):
+    for index in table.indexes:
+        try:
+            index.create(bind=engine, checkfirst=True)
+        except DatabaseError as e:
+            if not (index.unique and table is NewsArticle.__table__):
+                logger.error(f"Could not create index {index.name}: {e}")
+                continue
+            # Databases from before the unique index may already hold duplicate articles
+            try:
+                _dedupe_news_articles()
+                index.create(bind=engine, checkfirst=True)
+            except DatabaseError as retry_error:
+                logger.error(f"Could not create index {index.name}: {retry_error}")
+
 # Dependency to get database session
 def get_db():
     db = SessionLocal()
@@ -87,6 +178,23 @@ def get_db():
     finally:
         db.close()
 
+def _insert_or_ignore(model):
+    """INSERT that skips rows violating a unique index, or None if the dialect has no such form"""
+    dialect = engine.dialect.name
+    if dialect == "sqlite":
+        return sqlite.insert(model).on_conflict_do_nothing()
+    if dialect == "postgresql":
+        return postgresql.insert(model).on_conflict_do_nothing()
+    if dialect in ("mysql", "mariadb"):
+        return mysql.insert(model).prefix_with("IGNORE")
+    return None
+
+def _find_news_article(db: Session, url: str, company_name: str) -> Optional[NewsArticle]:
+    return db.query(NewsArticle).filter(
+        NewsArticle.url == url,
+        NewsArticle.company_name == company_name
+    ).first()
+
 # Database utility functions
 class DatabaseManager:
     def __init__(self):
@@ -95,8 +203,27 @@ class DatabaseManager:
     def get_session(self) -> Session:
         return SessionLocal()
 
-    def add_company(self, name: str, description: str = "", industry: str = "", website: str = "") -> Company:
-        with self.get_session() as db:
+    @contextmanager
+    def session_scope(self, session: Optional[Session] = None):
+        """Use the caller's session as-is, or commit the thread-local one on exit"""
+        if session is not None:
+            # The caller is batching several calls and owns the transaction
+            yield session
+            return
+
+        db = ScopedSession()
+        try:
+            yield db
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            # Returned objects stay loaded; the next call starts from fresh rows
+            db.expunge_all()
+
+    def add_company(self, name: str, description: str = "", industry: str = "", website: str = "", session: Optional[Session] = None) -> Company:
+        with self.session_scope(session) as db:
             existing = db.query(Company).filter(Company.name == name).first()
             if existing:
                 return existing
@@ -108,13 +235,12 @@ class DatabaseManager:
                 website=website
             )
             db.add(company)
-            db.commit()
-            db.refresh(company)
+            db.flush()
             return company
 
     def add_company_document(self, company_name: str, doc_type: str, title: str,
-                           content: str, source_url: str = "", file_path: str = "") -> CompanyDocument:
-        with self.get_session() as db:
+                           content: str, source_url: str = "", file_path: str = "", session: Optional[Session] = None) -> CompanyDocument:
+        with self.session_scope(session) as db:
             document = CompanyDocument(
                 company_name=company_name,
                 document_type=doc_type,
@@ -124,40 +250,83 @@ class DatabaseManager:
                 file_path=file_path
             )
             db.add(document)
-            db.commit()
-            db.refresh(document)
+            db.flush()
             return document
 
-    def add_news_article(self, article_data: dict) -> NewsArticle:
-        with self.get_session() as db:
-            # Check for duplicates (only if URL is not empty)
-            url = article_data.get('url', '')
-            if url:  # Only check for duplicates if URL exists
-                existing = db.query(NewsArticle).filter(
-                    NewsArticle.url == url,
-                    NewsArticle.company_name == article_data.get('company_name')
-                ).first()
+    def add_company_documents_bulk(self, documents: list, session: Optional[Session] = None) -> int:
+        """Insert many company documents in one transaction"""
+        if not documents:
+            return 0
 
+        with self.session_scope(session) as db:
+            db.add_all([CompanyDocument(**document_data) for document_data in documents])
+            return len(documents)
+
+    def add_news_article(self, article_data: dict, session: Optional[Session] = None) -> NewsArticle:
+        with self.session_scope(session) as db:
+            url = article_data.get('url', '')
+            company_name = article_data.get('company_name')
+            statement = _insert_or_ignore(NewsArticle)
+            if statement is None:
+                # No conflict-ignoring insert on this backend; check first, as before the index
+                existing = _find_news_article(db, url, company_name) if url else None
                 if existing:
                     return existing
-
-            article = NewsArticle(**article_data)
-            db.add(article)
-            db.commit()
-            db.refresh(article)
-            return article
-
-    def add_contradiction_analysis(self, analysis_data: dict) -> ContradictionAnalysis:
-        with self.get_session() as db:
+                article = NewsArticle(**article_data)
+                db.add(article)
+                db.flush()
+                return article
+
+            # The unique (url, company_name) index makes duplicates a no-op insert
+            result = db.execute(statement.values(**article_data))
+
+            if result.rowcount:
+                return db.get(NewsArticle, result.inserted_primary_key[0])
+
+            return _find_news_article(db, url, company_name)
+
+    def add_news_articles_bulk(self, articles: list, session: Optional[Session] = None) -> int:
+        """Insert many articles in one transaction, skipping duplicate URLs"""
+        if not articles:
+            return 0
+
+        with self.session_scope(session) as db:
+            statement = _insert_or_ignore(NewsArticle)
+            if statement is not None:
+                return db.execute(statement, articles).rowcount
+
+            # Fallback for other backends: drop duplicates of stored and earlier batch rows
+            new_articles = []
+            seen = set()
+            for article_data in articles:
+                key = (article_data.get('url', ''), article_data.get('company_name'))
+                if key[0]:
+                    if key in seen or _find_news_article(db, *key):
+                        continue
+                    seen.add(key)
+                new_articles.append(NewsArticle(**article_data))
+            db.add_all(new_articles)
+            return len(new_articles)
+
+    def add_contradiction_analysis(self, analysis_data: dict, session: Optional[Session] = None) -> ContradictionAnalysis:
+        with self.session_scope(session) as db:
             analysis = ContradictionAnalysis(**analysis_data)
             db.add(analysis)
-            db.commit()
-            db.refresh(analysis)
+            db.flush()
             return analysis
 
+    def add_contradiction_analyses_bulk(self, analyses: list, session: Optional[Session] = None) -> int:
+        """Insert many analyses in one transaction"""
+        if not analyses:
+            return 0
+
+        with self.session_scope(session) as db:
+            db.add_all([ContradictionAnalysis(**analysis_data) for analysis_data in analyses])
+            return len(analyses)
+
     def add_alert(self, company_name: str, alert_type: str, level: str,
-                 title: str, message: str, data: dict = None) -> Alert:
-        with self.get_session() as db:
+                 title: str, message: str, data: dict = None, session: Optional[Session] = None) -> Alert:
+        with self.session_scope(session) as db:
             alert = Alert(
                 company_name=company_name,
                 alert_type=alert_type,
@@ -167,103 +336,104 @@ class DatabaseManager:
                 data=data or {}
             )
             db.add(alert)
-            db.commit()
-            db.refresh(alert)
+            db.flush()
             return alert
 
-    def get_companies(self) -> list:
-        with self.get_session() as db:
+    def get_companies(self, session: Optional[Session] = None) -> list:
+        with self.session_scope(session) as db:
             return db.query(Company).all()
 
-    def get_company_documents(self, company_name: str) -> list:
-        with self.get_session() as db:
+    def get_company_documents(self, company_name: str, session: Optional[Session] = None) -> list:
+        with self.session_scope(session) as db:
             return db.query(CompanyDocument).filter(
                 CompanyDocument.company_name == company_name
             ).all()
 
-    def get_recent_news(self, company_name: str = None, limit: int = 50) -> list:
-        with self.get_session() as db:
+    def get_recent_news(self, company_name: str = None, limit: int = 50, session: Optional[Session] = None) -> list:
+        with self.session_scope(session) as db:
             query = db.query(NewsArticle)
             if company_name:
                 query = query.filter(NewsArticle.company_name == company_name)
             return query.order_by(NewsArticle.published_at.desc()).limit(limit).all()
 
-    def get_recent_analyses(self, company_name: str = None, limit: int = 20) -> list:
-        with self.get_session() as db:
+    def get_recent_analyses(self, company_name: str = None, limit: int = 20, session: Optional[Session] = None) -> list:
+        with self.session_scope(session) as db:
             query = db.query(ContradictionAnalysis)
             if company_name:
                 query = query.filter(ContradictionAnalysis.company_name == company_name)
             return query.order_by(ContradictionAnalysis.created_at.desc()).limit(limit).all()
 
-    def get_unread_alerts(self, company_name: str = None) -> list:
-        with self.get_session() as db:
+    def get_unread_alerts(self, company_name: str = None, session: Optional[Session] = None) -> list:
+        with self.session_scope(session) as db:
             query = db.query(Alert).filter(Alert.is_read == 0)
             if company_name:
                 query = query.filter(Alert.company_name == company_name)
             return query.order_by(Alert.created_at.desc()).all()
 
-    def mark_alert_read(self, alert_id: int):
-        with self.get_session() as db:
+    def mark_alert_read(self, alert_id: int, session: Optional[Session] = None):
+        with self.session_scope(session) as db:
             alert = db.query(Alert).filter(Alert.id == alert_id).first()
             if alert:
                 alert.is_read = 1
-                db.commit()
 
-    def get_company_stats(self, company_name: str) -> dict:
-        with self.get_session() as db:
-            # Count documents
-            doc_count = db.query(CompanyDocument).filter(
-                CompanyDocument.company_name == company_name
-            ).count()
+    def get_company_stats(self, company_name: str, session: Optional[Session] = None) -> dict:
+        with self.session_scope(session) as db:
+            def count_for(model):
+                return select(func.count()).select_from(model).where(
+                    model.company_name == company_name
+                ).scalar_subquery()
 
-            # Count news articles
-            news_count = db.query(NewsArticle).filter(
-                NewsArticle.company_name == company_name
-            ).count()
-
-            # Count analyses
-            analysis_count = db.query(ContradictionAnalysis).filter(
-                ContradictionAnalysis.company_name == company_name
-            ).count()
-
-            # Get latest contradiction level
-            latest_analysis = db.query(ContradictionAnalysis).filter(
+            # Latest contradiction level
+            latest_level = select(ContradictionAnalysis.contradiction_level).where(
                 ContradictionAnalysis.company_name == company_name
-            ).order_by(ContradictionAnalysis.created_at.desc()).first()
+            ).order_by(ContradictionAnalysis.created_at.desc()).limit(1).scalar_subquery()
 
-            latest_level = latest_analysis.contradiction_level if latest_analysis else "UNKNOWN"
+            # All four stats in a single round trip
+            doc_count, news_count, analysis_count, latest_level = db.execute(select(
+                count_for(CompanyDocument),
+                count_for(NewsArticle),
+                count_for(ContradictionAnalysis),
+                latest_level
+            )).one()
 
             return {
                 "company_name": company_name,
                 "document_count": doc_count,
                 "news_count": news_count,
                 "analysis_count": analysis_count,
-                "latest_contradiction_level": latest_level
+                "latest_contradiction_level": latest_level or "UNKNOWN"
             }
 
-    def cleanup_old_data(self, days_old: int = 30):
+    def cleanup_old_data(self, days_old: int = 30, session: Optional[Session] = None):
         """Clean up old data to prevent database bloat"""
         cutoff_date = datetime.utcnow() - timedelta(days=days_old)
 
-        with self.get_session() as db:
+        with self.session_scope(session) as db:
             # Clean old news articles (keep only recent ones)
-            old_news = db.query(NewsArticle).filter(
-                NewsArticle.created_at < cutoff_date
-            ).delete()
-
-            # Clean old analyses (but keep some for trending)
-            old_analyses = db.query(ContradictionAnalysis).filter(
-                ContradictionAnalysis.created_at < cutoff_date
-            ).limit(1000).delete()  # Keep some for historical analysis
+            old_news = db.execute(
+                delete(NewsArticle).where(NewsArticle.created_at < cutoff_date)
+            ).rowcount
+
+            # Clean old analyses, but always keep the newest 1000 for trending. The boundary is
+            # read first: MySQL rejects LIMIT in an IN subquery on the table being deleted from
+            oldest_kept = db.execute(
+                select(ContradictionAnalysis.created_at)
+                .order_by(ContradictionAnalysis.created_at.desc())
+                .offset(999).limit(1)
+            ).scalar()
+            old_analyses = 0
+            if oldest_kept is not None:
+                old_analyses = db.execute(
+                    delete(ContradictionAnalysis).where(
+                        ContradictionAnalysis.created_at < min(cutoff_date, oldest_kept)
+                    )
+                ).rowcount
 
             # Clean read alerts older than 7 days
             week_ago = datetime.utcnow() - timedelta(days=7)
-            old_alerts = db.query(Alert).filter(
-                Alert.created_at < week_ago,
-                Alert.is_read == 1
-            ).delete()
-
-            db.commit()
+            old_alerts = db.execute(
+                delete(Alert).where(Alert.created_at < week_ago, Alert.is_read == 1)
+            ).rowcount
 
             return {
                 "deleted_news": old_news,
@@ -1,32 +1,234 @@
 import os
+import re
+import hashlib
+import multiprocessing
+import threading
+import ahocorasick
+import orjson
 import PyPDF2
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterator, List, Tuple
 import time
 from datetime import datetime
 
+try:
+    import pypdfium2 as pdfium
+    PDFIUM_AVAILABLE = True
+except ImportError:
+    PDFIUM_AVAILABLE = False
+
+# PDFium is not thread-safe, even across documents; only one thread may use it at a time
+_PDFIUM_LOCK = threading.Lock()
+
+# Below this many pages, process startup and IPC cost more than they save
+PARALLEL_PDF_MIN_PAGES = 4
+# Each worker holds its own parsed copy of the PDF, so don't scale with every core
+PDF_WORKERS = min(4, os.cpu_count() or 1)
+
+# PyPDF2 seeks around the file a lot; large buffers keep that in user space
+PDF_READ_BUFFER = 1 << 20
+TEXT_READ_BUFFER = 1 << 16
+
+# Keywords to look for promises/commitments
+DEFAULT_KEYWORDS = (
+    'commitment', 'promise', 'pledge', 'value', 'mission', 'vision',
+    'environmental', 'sustainability', 'ethical', 'responsibility',
+    'employee', 'diversity', 'inclusion', 'community'
+)
+
+def _compile_keywords(keywords) -> re.Pattern:
+    """Compile keywords into one case-insensitive alternation"""
+    return re.compile('|'.join(re.escape(k) for k in keywords), re.IGNORECASE)
+
+def _build_keyword_automaton(keywords) -> ahocorasick.Automaton:
+    """Aho-Corasick automaton over lowercased keywords, valued by keyword length"""
+    automaton = ahocorasick.Automaton()
+    for keyword in keywords:
+        keyword = keyword.lower()
+        if keyword:
+            automaton.add_word(keyword, len(keyword))
+    automaton.make_automaton()
+    return automaton
+
+@lru_cache(maxsize=64)
+def _custom_keyword_matchers(keywords: frozenset) -> Tuple[ahocorasick.Automaton, re.Pattern]:
+    """Automaton and regex fallback for a caller-supplied keyword set"""
+    return _build_keyword_automaton(keywords), _compile_keywords(sorted(keywords))
+
+# How long a company's scanned documents are reused before rescanning (seconds)
+PROCESSED_DOCS_TTL = 3600
+
+# Same pieces as content.split('.'), minus the empty ones
+_SENTENCE_RE = re.compile(r'[^.]+')
+_DOT_RE = re.compile(r'\.')
+
+def _matching_sentences(content: str, automaton: ahocorasick.Automaton,
+                        keyword_regex: re.Pattern) -> Iterator[str]:
+    """Yield, in order, each '.'-delimited sentence of content containing a keyword"""
+    lowered = content.lower()
+    if len(lowered) != len(content):
+        # Some characters lowercase to several code points, so offsets no longer line up
+        for match in _SENTENCE_RE.finditer(content):
+            if keyword_regex.search(match.group()):
+                yield match.group()
+        return
+
+    # One pass over the whole document, then map hit offsets to sentences
+    dots = [match.start() for match in _DOT_RE.finditer(content)]
+    last_sentence = -1
+    for end, length in automaton.iter(lowered):
+        sentence = bisect_left(dots, end - length + 1)
+        if sentence <= last_sentence:
+            continue
+        sentence_end = dots[sentence] if sentence < len(dots) else len(content)
+        if end >= sentence_end:
+            # Keyword spans a sentence boundary
+            continue
+        last_sentence = sentence
+        yield content[dots[sentence - 1] + 1 if sentence else 0:sentence_end]
+
+# Extracted text for unchanged files, keyed by path + mtime + size
+DOC_CACHE_DIR = Path.home() / ".cache" / "fakenews" / "docs"
+
+def _extract_page_range(file_path: str, start: int, stop: int) -> List[str]:
+    """Extract text for pages [start, stop) in a worker process"""
+    with open(file_path, 'rb', buffering=PDF_READ_BUFFER) as file:
+        reader = PyPDF2.PdfReader(file)
+        return [reader.pages[i].extract_text() for i in range(start, stop)]
+
 class DocumentProcessor:
     def __init__(self, docs_directory="company_documents"):
         self.docs_directory = docs_directory
+        # company_id -> (scan time, documents)
         self.processed_docs = {}
+        self._pdf_executor = None
+        self._pdf_executor_lock = threading.Lock()
+        self._default_kw_re = _compile_keywords(DEFAULT_KEYWORDS)
+        self._default_kw_automaton = _build_keyword_automaton(DEFAULT_KEYWORDS)
+        # In-memory layer over the on-disk extraction cache
+        self._cached_extract = lru_cache(maxsize=256)(self._extract_with_disk_cache)
+
+    @property
+    def pdf_executor(self) -> ProcessPoolExecutor:
+        """Process pool for page-parallel PDF extraction, created on first use"""
+        with self._pdf_executor_lock:
+            if self._pdf_executor is None:
+                # Spawned workers don't inherit the server's threads, locks or sockets
+                self._pdf_executor = ProcessPoolExecutor(
+                    max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pdf_executor
+
+    def shutdown(self):
+        """Stop the PDF worker processes, if any were started"""
+        with self._pdf_executor_lock:
+            if self._pdf_executor is not None:
+                self._pdf_executor.shutdown(cancel_futures=True)
+                self._pdf_executor = None
 
     def extract_pdf_content(self, file_path: str) -> str:
         """Extract text content from PDF file"""
+        return self._extract_cached(file_path, '.pdf')
+
+    def extract_text_content(self, file_path: str) -> str:
+        """Extract content from text file"""
+        return self._extract_cached(file_path, '.txt')
+
+    def _extract_cached(self, file_path: str, ext: str) -> str:
+        """Return extracted text, skipping extraction when the file is unchanged"""
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            # Let the extractor report the missing file
+            return self._extract_uncached(file_path, ext)
+
+        identity = f"{os.path.abspath(file_path)}\0{stat.st_mtime_ns}\0{stat.st_size}"
+        key = hashlib.blake2b(identity.encode(), digest_size=16).hexdigest()
+        return self._cached_extract(key, file_path, ext)
+
+    def _extract_with_disk_cache(self, key: str, file_path: str, ext: str) -> str:
+        """Load extracted text from the disk cache, extracting and storing on a miss"""
+        cache_file = DOC_CACHE_DIR / f"{key}.json"
         try:
-            with open(file_path, 'rb') as file:
+            with open(cache_file, 'rb') as f:
+                return orjson.loads(f.read())['content']
+        except (OSError, ValueError, KeyError):
+            pass
+
+        content = self._extract_uncached(file_path, ext)
+        if content:
+            try:
+                DOC_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+                tmp_file = cache_file.with_suffix('.tmp')
+                with open(tmp_file, 'wb') as f:
+                    f.write(orjson.dumps({'file_path': file_path, 'content': content}))
+                os.replace(tmp_file, cache_file)
+            except OSError as e:
+                print(f"Could not write document cache for {file_path}: {e}")
+        return content
+
+    def _extract_uncached(self, file_path: str, ext: str) -> str:
+        """Run the extractor for ext without consulting any cache"""
+        if ext == '.pdf':
+            return self._extract_pdf(file_path)
+        return self._extract_text(file_path)
+
+    def _extract_pdf(self, file_path: str) -> str:
+        """Extract text from a PDF with the fastest available backend"""
+        if PDFIUM_AVAILABLE:
+            try:
+                return self._extract_pdf_pdfium(file_path)
+            except Exception as e:
+                print(f"PDFium failed on {file_path}, falling back to PyPDF2: {e}")
+
+        return self._extract_pdf_pypdf2(file_path)
+
+    def _extract_pdf_pdfium(self, file_path: str) -> str:
+        """Extract text with PDFium's native text layer"""
+        with _PDFIUM_LOCK:
+            pdf = pdfium.PdfDocument(file_path)
+            try:
+                parts = []
+                for page in pdf:
+                    textpage = page.get_textpage()
+                    parts.append(textpage.get_text_range() + "\n")
+                    textpage.close()
+                    page.close()
+                return "".join(parts).strip()
+            finally:
+                pdf.close()
+
+    def _extract_pdf_pypdf2(self, file_path: str) -> str:
+        """Extract text with PyPDF2, page-parallel for larger files"""
+        try:
+            with open(file_path, 'rb', buffering=PDF_READ_BUFFER) as file:
                 reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page in reader.pages:
-                    text += page.extract_text() + "\n"
-                return text.strip()
+                page_count = len(reader.pages)
+
+                if page_count < PARALLEL_PDF_MIN_PAGES:
+                    return "".join(page.extract_text() + "\n" for page in reader.pages).strip()
+
+            # One contiguous page range per worker, so each reopens the file only once
+            workers = min(PDF_WORKERS, page_count)
+            step = -(-page_count // workers)
+            starts = range(0, page_count, step)
+            stops = [min(start + step, page_count) for start in starts]
+            chunks = self.pdf_executor.map(
+                _extract_page_range, [file_path] * len(starts), starts, stops
+            )
+            return "".join(text + "\n" for chunk in chunks for text in chunk).strip()
         except Exception as e:
             print(f"Error processing PDF {file_path}: {e}")
             return ""
 
-    def extract_text_content(self, file_path: str) -> str:
-        """Extract content from text file"""
+    def _extract_text(self, file_path: str) -> str:
+        """Read a UTF-8 text file"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
+            with open(file_path, 'r', encoding='utf-8', buffering=TEXT_READ_BUFFER) as file:
                 return file.read()
         except Exception as e:
             print(f"Error processing text file {file_path}: {e}")
@@ -34,6 +236,10 @@ class DocumentProcessor:
 
     def process_company_documents(self, company_id: str) -> Dict:
         """Process all documents for a specific company"""
+        cached = self.processed_docs.get(company_id)
+        if cached and time.time() - cached[0] < PROCESSED_DOCS_TTL:
+            return cached[1]
+
         company_path = Path(self.docs_directory) / company_id
 
         if not company_path.exists():
@@ -42,55 +248,54 @@ class DocumentProcessor:
 
         documents = {}
 
-        for file_path in company_path.glob("*"):
-            if file_path.is_file():
-                file_ext = file_path.suffix.lower()
+        # DirEntry caches its type and stat, so each file costs at most one stat call
+        with os.scandir(company_path) as entries:
+            for entry in entries:
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+
+                doc_type, file_ext = os.path.splitext(entry.name)
+                file_ext = file_ext.lower()
 
                 if file_ext == '.pdf':
-                    content = self.extract_pdf_content(str(file_path))
-                elif file_ext in ['.txt', '.md']:
-                    content = self.extract_text_content(str(file_path))
+                    content = self.extract_pdf_content(entry.path)
+                elif file_ext in ('.txt', '.md'):
+                    content = self.extract_text_content(entry.path)
                 else:
                     continue
 
                 if content:
-                    doc_type = file_path.stem
                     documents[doc_type] = {
                         'content': content,
-                        'file_path': str(file_path),
-                        'timestamp': int(file_path.stat().st_mtime),
+                        'file_path': entry.path,
+                        'timestamp': int(entry.stat().st_mtime),
                         'document_type': doc_type
                     }
 
-        self.processed_docs[company_id] = documents
+        self.processed_docs[company_id] = (time.time(), documents)
         return documents
 
+    def invalidate_company(self, company_id: str):
+        """Drop cached documents so the next access rescans the company folder"""
+        self.processed_docs.pop(company_id, None)
+
     def get_company_promises(self, company_id: str, keywords: List[str] = None) -> str:
         """Extract company promises/commitments from documents"""
-        if company_id not in self.processed_docs:
-            self.process_company_documents(company_id)
-
-        company_docs = self.processed_docs.get(company_id, {})
-        promises = []
-
-        # Keywords to look for promises/commitments
-        if not keywords:
-            keywords = [
-                'commitment', 'promise', 'pledge', 'value', 'mission', 'vision',
-                'environmental', 'sustainability', 'ethical', 'responsibility',
-                'employee', 'diversity', 'inclusion', 'community'
-            ]
-
-        for doc_type, doc_data in company_docs.items():
-            content = doc_data['content']
-            # Simple keyword-based extraction (can be enhanced with NLP)
-            sentences = content.split('.')
-
-            for sentence in sentences:
-                if any(keyword.lower() in sentence.lower() for keyword in keywords):
-                    promises.append(f"[{doc_type}] {sentence.strip()}")
-
-        return "\n".join(promises[:10])  # Return top 10 relevant sentences
+        company_docs = self.process_company_documents(company_id)
+
+        if keywords:
+            automaton, keyword_regex = _custom_keyword_matchers(frozenset(keywords))
+        else:
+            automaton, keyword_regex = self._default_kw_automaton, self._default_kw_re
+
+        def matching_sentences():
+            for doc_type, doc_data in company_docs.items():
+                # Simple keyword-based extraction (can be enhanced with NLP)
+                for sentence in _matching_sentences(doc_data['content'], automaton, keyword_regex):
+                    yield f"[{doc_type}] {sentence.strip()}"
+
+        # Stop scanning as soon as the top 10 relevant sentences are found
+        return "\n".join(islice(matching_sentences(), 10))
 
     def create_sample_documents(self):
         """Create sample company documents for demo"""
@@ -0,0 +1,170 @@
+import itertools
+import logging
+import multiprocessing as mp
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# How often the dispatcher checks that the worker process is still running
+LIVENESS_INTERVAL = 1.0
+
+def _worker_main(loader: Callable, requests, responses, max_batch: int, max_wait: float):
+    """Child process loop: collect a microbatch, encode it once, send rows back"""
+    import torch
+
+    try:
+        model = loader()
+        load_error = None
+    except Exception as e:
+        model = None
+        load_error = f"Embedding worker failed to load model: {e}"
+
+    running = True
+    while running:
+        item = requests.get()
+        if item is None:
+            break
+
+        # Gather up to max_batch requests, waiting at most max_wait for stragglers
+        batch = [item]
+        deadline = time.monotonic() + max_wait
+        while len(batch) < max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                running = False
+                break
+            batch.append(item)
+
+        if model is None:
+            for request_id, _ in batch:
+                responses.put((request_id, None, load_error))
+            continue
+
+        texts = [text for _, request_texts in batch for text in request_texts]
+        try:
+            # encode() sorts the merged batch by length internally, so padding stays per-bucket
+            with torch.inference_mode():
+                embeddings = model.encode(texts, batch_size=max_batch, normalize_embeddings=True).astype(np.float32)
+        except Exception as e:
+            for request_id, _ in batch:
+                responses.put((request_id, None, f"Embedding worker encode failed: {e}"))
+            continue
+
+        offset = 0
+        for request_id, request_texts in batch:
+            responses.put((request_id, embeddings[offset:offset + len(request_texts)], None))
+            offset += len(request_texts)
+
+    responses.put(None)
+
+class EmbeddingWorker:
+    """Runs the embedding model in a separate process and batches concurrent requests"""
+
+    def __init__(self, loader: Callable, max_batch: int = 32, max_wait: float = 0.01):
+        context = mp.get_context('spawn')
+        self._requests = context.Queue()
+        self._responses = context.Queue()
+        self._pending: Dict[int, Future] = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        # Set once the worker has exited; later requests fail immediately
+        self._stopped = False
+
+        self._process = context.Process(
+            target=_worker_main,
+            args=(loader, self._requests, self._responses, max_batch, max_wait),
+            daemon=True
+        )
+        self._process.start()
+
+        self._dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+        self._dispatcher.start()
+        logger.info(f"Embedding worker started (pid {self._process.pid})")
+
+    def submit(self, texts: List[str]) -> Future:
+        """Queue texts for encoding and return a future for their embeddings"""
+        return self._submit(texts)[1]
+
+    def encode(self, texts: List[str], timeout: float = 60.0) -> np.ndarray:
+        """Encode texts in the worker process, blocking until they are ready"""
+        request_id, future = self._submit(texts)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            # The caller has given up; don't keep the future around for a late reply
+            with self._lock:
+                self._pending.pop(request_id, None)
+            future.cancel()
+            raise
+
+    def _submit(self, texts: List[str]) -> Tuple[int, Future]:
+        """Register a future for texts and queue them, failing it at once if the worker is gone"""
+        future = Future()
+        request_id = next(self._ids)
+        with self._lock:
+            if self._stopped or not self._process.is_alive():
+                future.set_exception(RuntimeError("Embedding worker is not running"))
+                return request_id, future
+            self._pending[request_id] = future
+        self._requests.put((request_id, list(texts)))
+        return request_id, future
+
+    def _fail_pending(self, reason: str):
+        """Stop accepting requests and fail every outstanding future"""
+        with self._lock:
+            self._stopped = True
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if future.set_running_or_notify_cancel():
+                future.set_exception(RuntimeError(reason))
+
+    def _dispatch(self):
+        """Resolve pending futures as the worker sends results back"""
+        while True:
+            try:
+                message = self._responses.get(timeout=LIVENESS_INTERVAL)
+            except queue.Empty:
+                if self._process.is_alive():
+                    continue
+                logger.error(f"Embedding worker exited unexpectedly (exit code {self._process.exitcode})")
+                self._fail_pending("Embedding worker exited unexpectedly")
+                break
+
+            if message is None:
+                self._fail_pending("Embedding worker stopped")
+                break
+
+            request_id, embeddings, error = message
+            with self._lock:
+                future = self._pending.pop(request_id, None)
+            if future is None or not future.set_running_or_notify_cancel():
+                continue
+            if error:
+                future.set_exception(RuntimeError(error))
+            else:
+                future.set_result(embeddings)
+
+    def close(self):
+        """Stop the worker process"""
+        with self._lock:
+            if self._stopped and not self._process.is_alive():
+                return
+            self._stopped = True
+        self._requests.put(None)
+        self._process.join(timeout=5)
+        if self._process.is_alive():
+            self._process.terminate()
+            self._process.join(timeout=1)
+        self._fail_pending("Embedding worker stopped")
@@ -1,11 +1,12 @@
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends, HTTPException, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse
 from pydantic import BaseModel
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Set
 import asyncio
-import json
+from concurrent.futures import ThreadPoolExecutor
+import orjson
 import logging
 from datetime import datetime
 import os
@@ -30,7 +31,8 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="AI Corporate Hypocrisy Detector",
     description="Real-time analysis of corporate promises vs actions",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware
@@ -49,6 +51,12 @@ vector_store = VectorStore()
 doc_store = CompanyDocumentStore(vector_store)
 doc_processor = DocumentProcessor()
 
+UPLOAD_CHUNK_SIZE = 1 << 20
+# Caps concurrently open upload files and the blocking work behind them
+UPLOAD_SEM = asyncio.Semaphore(32)
+# Dedicated pool for document extraction, separate from the loop's default executor
+PDF_EXECUTOR = ThreadPoolExecutor(max_workers=os.cpu_count(), thread_name_prefix="doc-extract")
+
 # Pydantic models
 class CompanyRequest(BaseModel):
     name: str
@@ -70,31 +78,50 @@ class NewsUpdate(BaseModel):
 # WebSocket connection manager
 class ConnectionManager:
     def __init__(self):
-        self.active_connections: List[WebSocket] = []
+        self.active_connections: Set[WebSocket] = set()
 
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
-        self.active_connections.append(websocket)
+        self.active_connections.add(websocket)
         logger.info(f"WebSocket connected. Total connections: {len(self.active_connections)}")
 
     def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
+        self.active_connections.discard(websocket)
         logger.info(f"WebSocket disconnected. Total connections: {len(self.active_connections)}")
 
     async def send_personal_message(self, message: str, websocket: WebSocket):
         await websocket.send_text(message)
 
     async def broadcast(self, message: str):
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message)
-            except:
+        # Send to everyone concurrently so one slow client can't hold up the rest
+        connections = list(self.active_connections)
+        results = await asyncio.gather(
+            *(connection.send_text(message) for connection in connections),
+            return_exceptions=True
+        )
+
+        for connection, result in zip(connections, results):
+            if isinstance(result, Exception):
                 # Remove broken connections
-                self.active_connections.remove(connection)
+                self.disconnect(connection)
 
 manager = ConnectionManager()
 
+def news_article_record(company_name: str, article: NewsArticle) -> dict:
+    """Map a fetched article to NewsArticle table columns"""
+    return {
+        "company_name": company_name,
+        "title": article.title,
+        "content": article.content,
+        "url": article.url,
+        "source": article.source,
+        "published_at": article.published_at,
+        "sentiment_score": article.sentiment_score,
+        "relevance_score": article.relevance_score,
+        "severity": article.severity,
+        "keywords": article.keywords
+    }
+
 # Startup event
 @app.on_event("startup")
 async def startup_event():
@@ -208,20 +235,22 @@ async def add_sample_documents():
         )
     ]
 
-    for company, doc_type, content in sample_docs:
-        # Add to database
-        db_manager.add_company_document(
-            company_name=company,
-            doc_type=doc_type,
-            title=f"{company} {doc_type}",
-            content=content
-        )
+    # Add to database in one transaction
+    db_manager.add_company_documents_bulk([
+        {
+            "company_name": company,
+            "document_type": doc_type,
+            "title": f"{company} {doc_type}",
+            "content": content
+        }
+        for company, doc_type, content in sample_docs
+    ])
 
-        # Add to vector store
-        doc_store.add_company_document(company, doc_type, content)
+    # Add to vector store as a single batch
+    doc_store.add_company_documents(sample_docs)
 
-    # Save vector store
-    vector_store.save_index()
+    # Save vector store once for the whole batch, off the event loop
+    await asyncio.to_thread(vector_store.save_index)
 
 # API Routes
 
@@ -348,12 +377,12 @@ async def analyze_company(request: AnalysisRequest):
             )
 
             # Broadcast alert via WebSocket
-            await manager.broadcast(json.dumps({
+            await manager.broadcast(orjson.dumps({
                 "type": "alert",
                 "company": request.company,
                 "level": result.contradiction_level,
                 "message": f"New contradiction detected for {request.company}"
-            }))
+            }).decode())
 
         return {
             "company": result.company,
@@ -374,23 +403,13 @@ async def get_company_news(company_name: str, limit: int = 20):
     """Get recent news for a company"""
     try:
         # Try to fetch fresh news
-        fresh_news = await news_service.fetch_company_news(company_name, days_back=7)
-
-        # Save fresh news to database
-        for article in fresh_news[:10]:  # Limit to avoid spam
-            article_data = {
-                "company_name": company_name,
-                "title": article.title,
-                "content": article.content,
-                "url": article.url,
-                "source": article.source,
-                "published_at": article.published_at,
-                "sentiment_score": article.sentiment_score,
-                "relevance_score": article.relevance_score,
-                "severity": article.severity,
-                "keywords": article.keywords
-            }
-            db_manager.add_news_article(article_data)
+        fresh_news = await news_service.fetch_company_news(company_name, days_back=7, limit=10)
+
+        # Save fresh news to database in one transaction
+        db_manager.add_news_articles_bulk([
+            news_article_record(company_name, article)
+            for article in fresh_news  # Limited to avoid spam
+        ])
 
         # Get news from database
         db_news = db_manager.get_recent_news(company_name, limit)
@@ -432,12 +451,12 @@ async def add_news_update(update: NewsUpdate):
         article = db_manager.add_news_article(article_data)
 
         # Broadcast news update via WebSocket
-        await manager.broadcast(json.dumps({
+        await manager.broadcast(orjson.dumps({
             "type": "news_update",
             "company": update.company,
             "headline": update.headline,
             "severity": update.severity
-        }))
+        }).decode())
 
         return {"message": "News update added successfully", "id": article.id}
 
@@ -486,38 +505,46 @@ async def upload_document(
     file: UploadFile = File(...)
 ):
     """Upload a company document"""
-    try:
-        # Save uploaded file
-        upload_dir = Path("uploads")
-        upload_dir.mkdir(exist_ok=True)
-
-        file_path = upload_dir / f"{company}_{doc_type}_{file.filename}"
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-
-        # Process document
-        if file.filename.endswith('.pdf'):
-            content = doc_processor.extract_pdf_content(str(file_path))
-        else:
-            content = content.decode('utf-8')
-
-        # Add to database and vector store
-        db_manager.add_company_document(
-            company_name=company,
-            doc_type=doc_type,
-            title=file.filename,
-            content=content,
-            file_path=str(file_path)
-        )
+    async with UPLOAD_SEM:
+        try:
+            # Save uploaded file
+            upload_dir = Path("uploads")
+            upload_dir.mkdir(exist_ok=True)
+
+            file_path = upload_dir / f"{company}_{doc_type}_{file.filename}"
+            # Stream to disk in 1 MiB chunks so large uploads never sit fully in memory
+            with open(file_path, "wb", buffering=UPLOAD_CHUNK_SIZE) as buffer:
+                while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                    buffer.write(chunk)
+
+            # Process document (extraction is blocking; keep it off the event loop)
+            loop = asyncio.get_running_loop()
+            if file.filename.endswith('.pdf'):
+                content = await loop.run_in_executor(PDF_EXECUTOR, doc_processor.extract_pdf_content, str(file_path))
+            else:
+                content = await loop.run_in_executor(PDF_EXECUTOR, doc_processor.extract_text_content, str(file_path))
+
+            # Extractors log and return "" on failure (e.g. binary or non-UTF-8 text); never index that
+            if not content or not content.strip():
+                raise ValueError(f"Could not extract any text from {file.filename}")
+
+            # Add to database and vector store
+            db_manager.add_company_document(
+                company_name=company,
+                doc_type=doc_type,
+                title=file.filename,
+                content=content,
+                file_path=str(file_path)
+            )
 
-        doc_store.add_company_document(company, doc_type, content, str(file_path))
-        vector_store.save_index()
+            doc_store.add_company_document(company, doc_type, content, str(file_path))
+            await asyncio.to_thread(vector_store.save_index)
+            doc_processor.invalidate_company(company)
 
-        return {"message": "Document uploaded and processed successfully"}
+            return {"message": "Document uploaded and processed successfully"}
 
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
@@ -532,6 +559,14 @@ async def websocket_endpoint(websocket: WebSocket):
     except WebSocketDisconnect:
         manager.disconnect(websocket)
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release pooled network connections and worker pools"""
+    await news_service.close()
+    ai_service.close()
+    PDF_EXECUTOR.shutdown(cancel_futures=True)
+    doc_processor.shutdown()
+
 # Background task for periodic news updates
 @app.on_event("startup")
 async def start_background_tasks():
@@ -544,23 +579,13 @@ async def periodic_news_update():
             companies = db_manager.get_companies()
             for company in companies:
                 # Fetch news for each company
-                news = await news_service.fetch_company_news(company.name, days_back=1)
-
-                # Save new articles
-                for article in news[:5]:  # Limit to avoid spam
-                    article_data = {
-                        "company_name": company.name,
-                        "title": article.title,
-                        "content": article.content,
-                        "url": article.url,
-                        "source": article.source,
-                        "published_at": article.published_at,
-                        "sentiment_score": article.sentiment_score,
-                        "relevance_score": article.relevance_score,
-                        "severity": article.severity,
-                        "keywords": article.keywords
-                    }
-                    db_manager.add_news_article(article_data)
+                news = await news_service.fetch_company_news(company.name, days_back=1, limit=5)
+
+                # Save new articles in one transaction
+                db_manager.add_news_articles_bulk([
+                    news_article_record(company.name, article)
+                    for article in news  # Limited to avoid spam
+                ])
 
             logger.info("Completed periodic news update")
 
@@ -1,21 +1,47 @@
 import os
-import requests
 import feedparser
 import asyncio
 import aiohttp
-from typing import Dict, List, Optional
+import functools
+import io
+import multiprocessing
+import xml.etree.ElementTree as ET
+import heapq
+from operator import attrgetter
+from types import SimpleNamespace
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from collections import Counter, defaultdict
 from dataclasses import dataclass, asdict
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
 import logging
-import json
+import orjson
 import time
 from newsapi import NewsApiClient
 import re
+import ahocorasick
+import numpy as np
+from urllib.parse import quote
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Seconds to reuse a source's results; NewsAPI's free tier allows 100 requests/day
+SOURCE_CACHE_TTLS = {'newsapi': 900}
+DEFAULT_SOURCE_CACHE_TTL = 300
+SOURCE_CACHE_MAX_ENTRIES = 1024
+
+# After a keyword hit, allow a plural or inflected ending but no further word characters
+_KEYWORD_END_RE = re.compile(r'(?:s|es|d|ed|ing)?\b')
+
+@functools.lru_cache(maxsize=4096)
+def _mentions_company(title: str, summary: str, company_keywords: Tuple[str, ...]) -> bool:
+    """Whether any company term appears in the title or summary; feeds often repeat entries"""
+    text = (title + ' ' + summary).lower()
+    return any(keyword in text for keyword in company_keywords)
+
+@dataclass(slots=True)
 class NewsArticle:
     title: str
     content: str
@@ -32,11 +58,269 @@ class NewsArticle:
         if self.keywords is None:
             self.keywords = []
 
+_ATOM_NS = '{http://www.w3.org/2005/Atom}'
+
+def _feed_time(value: Optional[str]) -> Optional[time.struct_time]:
+    """UTC struct_time for an RFC 2822 or ISO 8601 feed date, like feedparser's *_parsed"""
+    if not value:
+        return None
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        try:
+            parsed = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc)
+    return parsed.timetuple()
+
+def _rss_item(item: ET.Element) -> SimpleNamespace:
+    """The few fields we use from an RSS <item>"""
+    published = item.findtext('pubDate')
+    return SimpleNamespace(
+        title=(item.findtext('title') or '').strip(),
+        summary=item.findtext('description') or '',
+        link=(item.findtext('link') or '').strip(),
+        published=published,
+        published_parsed=_feed_time(published)
+    )
+
+def _atom_entry(entry: ET.Element) -> SimpleNamespace:
+    """The few fields we use from an Atom <entry>"""
+    link = ''
+    for link_elem in entry.iter(f'{_ATOM_NS}link'):
+        if link_elem.get('rel', 'alternate') == 'alternate':
+            link = link_elem.get('href', '')
+            break
+    published = entry.findtext(f'{_ATOM_NS}published') or entry.findtext(f'{_ATOM_NS}updated')
+    return SimpleNamespace(
+        title=(entry.findtext(f'{_ATOM_NS}title') or '').strip(),
+        summary=entry.findtext(f'{_ATOM_NS}summary') or entry.findtext(f'{_ATOM_NS}content') or '',
+        link=link,
+        published=published,
+        published_parsed=_feed_time(published)
+    )
+
+def _parse_feed(body: bytes, max_entries: int):
+    """Stream the first entries out of an RSS/Atom body, falling back to feedparser"""
+    entries = []
+    try:
+        for _, elem in ET.iterparse(io.BytesIO(body)):
+            if elem.tag == 'item':
+                entries.append(_rss_item(elem))
+            elif elem.tag == f'{_ATOM_NS}entry':
+                entries.append(_atom_entry(elem))
+            else:
+                continue
+            elem.clear()
+            # Stop reading once we have as many entries as the caller will use
+            if len(entries) >= max_entries:
+                break
+    except ET.ParseError:
+        entries = []
+
+    # Malformed XML and less common formats (RSS 1.0/RDF) get feedparser's lenient parser
+    if not entries:
+        entries = feedparser.parse(body).entries[:max_entries]
+    return SimpleNamespace(entries=entries)
+
+@functools.lru_cache(maxsize=64)
+def _date_range_strs(days_back: int, today: date) -> Tuple[str, str]:
+    """NewsAPI from/to dates; keyed on today so entries roll over daily"""
+    return (today - timedelta(days=days_back)).isoformat(), today.isoformat()
+
+@functools.lru_cache(maxsize=512)
+def _google_rss_url(company: str) -> str:
+    """Google News search URL for a company"""
+    query = f'"{company}" OR "{company} inc" OR "{company} corp"'
+    return f"https://news.google.com/rss/search?q={quote(query)}&hl=en-US&gl=US&ceid=US:en"
+
+# Column order of the per-article keyword count matrix
+_SCORE_BUCKETS = ('high', 'medium', 'low', 'positive', 'negative', 'business')
+
+# Below this many articles, shipping texts to a worker process costs more than scanning inline
+SCORING_PROCESS_MIN_BATCH = 100
+
+# Keyword automaton inside a scoring worker process
+_worker_automaton: Optional[ahocorasick.Automaton] = None
+
+def _keyword_hits(automaton: ahocorasick.Automaton, text_lower: str) -> Tuple[Dict[str, set], List[str]]:
+    """Distinct static keywords found in the text, grouped by bucket, plus severity keywords in text order"""
+    # Each bucket counts a keyword once, however often it appears
+    hits: Dict[str, set] = {bucket: set() for bucket in _SCORE_BUCKETS}
+    severity_keywords: Dict[str, None] = {}
+    for end, (keyword, keyword_buckets, is_severity) in automaton.iter(text_lower):
+        # Whole words only, so 'bad' doesn't fire on 'badge' or 'win' on 'windows'
+        start = end - len(keyword) + 1
+        if start > 0 and (text_lower[start - 1].isalnum() or text_lower[start - 1] == '_'):
+            continue
+        if not _KEYWORD_END_RE.match(text_lower, end + 1):
+            continue
+        for bucket in keyword_buckets:
+            hits[bucket].add(keyword)
+        if is_severity:
+            severity_keywords[keyword] = None
+    return hits, list(severity_keywords)
+
+def _scan_texts(automaton: ahocorasick.Automaton, texts: List[str],
+                company_keywords: Tuple[str, ...]) -> List[Tuple[List[int], int, int, List[str]]]:
+    """Per text: bucket counts, word count, company mention count and severity keywords"""
+    scans = []
+    for text in texts:
+        text_lower = text.lower()
+        hits, keywords = _keyword_hits(automaton, text_lower)
+        # Company terms vary per call, so mentions are still counted directly
+        mentions = sum(text_lower.count(keyword) for keyword in company_keywords)
+        scans.append(([len(hits[bucket]) for bucket in _SCORE_BUCKETS], len(text.split()), mentions, keywords))
+    return scans
+
+def _init_scoring_worker(automaton: ahocorasick.Automaton):
+    global _worker_automaton
+    _worker_automaton = automaton
+
+def _scan_texts_in_worker(texts: List[str], company_keywords: Tuple[str, ...]):
+    return _scan_texts(_worker_automaton, texts, company_keywords)
+
+_TITLE_TOKEN_RE = re.compile(r'[^\W_]+', re.UNICODE)
+
+class _ArticleDeduplicator:
+    """Drops near-duplicate stories using token Jaccard over titles, with an inverted index for candidates"""
+
+    def __init__(self, threshold: float = 0.6):
+        self.threshold = threshold
+        self._token_sets: List[frozenset] = []
+        self._index: Dict[str, List[int]] = defaultdict(list)
+        self._seen_keys = set()
+
+    @staticmethod
+    def _tokens(title: str) -> frozenset:
+        # Crude stemming so 'fined'/'fines' and 'layoff'/'layoffs' line up
+        tokens = set()
+        for token in _TITLE_TOKEN_RE.findall(title.lower()):
+            if len(token) > 4 and token.endswith(('es', 'ed')):
+                token = token[:-2]
+            elif len(token) > 3 and token.endswith('s'):
+                token = token[:-1]
+            tokens.add(token)
+        return frozenset(tokens)
+
+    def add(self, article: NewsArticle) -> bool:
+        """Record the article and return True unless it duplicates one already seen"""
+        title_key = article.title[:50].lower().strip()
+        if title_key in self._seen_keys:
+            return False
+
+        tokens = self._tokens(article.title)
+        if tokens:
+            shared = Counter()
+            for token in tokens:
+                shared.update(self._index.get(token, ()))
+            for candidate, overlap in shared.items():
+                union = len(tokens) + len(self._token_sets[candidate]) - overlap
+                if overlap / union >= self.threshold:
+                    return False
+
+            position = len(self._token_sets)
+            self._token_sets.append(tokens)
+            for token in tokens:
+                self._index[token].append(position)
+
+        self._seen_keys.add(title_key)
+        return True
+
 class NewsService:
     def __init__(self):
         self.setup_apis()
         self.setup_rss_feeds()
         self.keyword_mappings = self._load_keyword_mappings()
+        self._keyword_automaton = self._build_keyword_automaton()
+        self._company_keyword_cache: Dict[str, Tuple[str, ...]] = {}
+        # (source, company, days_back) -> (fetched_at, articles)
+        self._source_cache: Dict[Tuple[str, str, int], Tuple[float, List[NewsArticle]]] = {}
+        # Shared HTTP session, created on first use inside the running event loop
+        self._session: Optional[aiohttp.ClientSession] = None
+        # Caps outbound requests in flight across every source
+        self._fetch_sem = asyncio.Semaphore(10)
+        # Feed XML parsing is CPU-bound; keep it off the default executor
+        self._parser_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="feed-parse")
+        # The NewsAPI client is synchronous (requests); run it off the event loop
+        self._io_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="news-io")
+        self._scoring_executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def scoring_executor(self) -> ProcessPoolExecutor:
+        """Process pool for scoring large article batches, created on first use"""
+        if self._scoring_executor is None:
+            # Spawned workers don't inherit the server's threads, locks or sockets
+            self._scoring_executor = ProcessPoolExecutor(
+                max_workers=2,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_scoring_worker,
+                initargs=(self._keyword_automaton,)
+            )
+        return self._scoring_executor
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the pooled HTTP session, creating it if needed"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=20,
+                    limit_per_host=10,
+                    ttl_dns_cache=300,
+                    enable_cleanup_closed=True
+                ),
+                timeout=aiohttp.ClientTimeout(total=10)
+            )
+        return self._session
+
+    async def _fetch_feed_bytes(self, url: str) -> bytes:
+        """Download a feed body over the shared session"""
+        session = await self._get_session()
+        async with self._fetch_sem:
+            async with session.get(url, timeout=aiohttp.ClientTimeout(total=5)) as response:
+                return await response.read()
+
+    async def _fetch_feed(self, url: str, max_entries: int = 20):
+        """Download a feed asynchronously and parse its first entries on the parser pool"""
+        body = await self._fetch_feed_bytes(url)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._parser_pool, _parse_feed, body, max_entries)
+
+    async def _cached_source(self, source: str, fetcher, company: str, days_back: int, *args) -> List[NewsArticle]:
+        """Run a source fetcher, reusing its last result while it is fresh"""
+        key = (source, company.lower(), days_back)
+        ttl = SOURCE_CACHE_TTLS.get(source, DEFAULT_SOURCE_CACHE_TTL)
+        cached = self._source_cache.get(key)
+        if cached and time.time() - cached[0] < ttl:
+            return list(cached[1])
+
+        articles = await fetcher(company, days_back, *args)
+
+        # Fetchers return [] on failure, so only cache real results
+        if articles:
+            if len(self._source_cache) >= SOURCE_CACHE_MAX_ENTRIES:
+                now = time.time()
+                self._source_cache = {
+                    cache_key: entry for cache_key, entry in self._source_cache.items()
+                    if now - entry[0] < SOURCE_CACHE_TTLS.get(cache_key[0], DEFAULT_SOURCE_CACHE_TTL)
+                }
+                if len(self._source_cache) >= SOURCE_CACHE_MAX_ENTRIES:
+                    self._source_cache.pop(next(iter(self._source_cache)))
+            self._source_cache[key] = (time.time(), articles)
+        return list(articles)
+
+    async def close(self):
+        """Close the shared HTTP session and worker pools"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._parser_pool.shutdown(wait=False)
+        self._io_pool.shutdown(wait=False)
+        if self._scoring_executor is not None:
+            self._scoring_executor.shutdown(wait=False)
+            self._scoring_executor = None
 
     def setup_apis(self):
         """Initialize news API clients"""
@@ -99,32 +383,64 @@ class NewsService:
                     'announcement', 'launch', 'expansion', 'growth',
                     'partnership', 'acquisition', 'investment', 'funding'
                 ]
-            }
+            },
+            'sentiment': {
+                'positive': ['success', 'growth', 'profit', 'win', 'achievement', 'positive', 'good', 'excellent'],
+                'negative': ['failure', 'loss', 'scandal', 'problem', 'bad', 'negative', 'crisis', 'controversy']
+            },
+            'business': ['financial', 'earnings', 'revenue', 'stock', 'shares', 'market', 'business', 'corporate']
         }
 
-    async def fetch_company_news(self, company: str, days_back: int = 7) -> List[NewsArticle]:
+    def _build_keyword_automaton(self) -> ahocorasick.Automaton:
+        """One automaton over every static keyword, each tagged with the buckets it counts toward"""
+        buckets: Dict[str, List[str]] = {}
+        for level, keywords in self.keyword_mappings['severity'].items():
+            for keyword in keywords:
+                buckets.setdefault(keyword, []).append(level)
+        for polarity, keywords in self.keyword_mappings['sentiment'].items():
+            for keyword in keywords:
+                buckets.setdefault(keyword, []).append(polarity)
+        for keyword in self.keyword_mappings['business']:
+            buckets.setdefault(keyword, []).append('business')
+
+        automaton = ahocorasick.Automaton()
+        for keyword, keyword_buckets in buckets.items():
+            # Flag severity terms up front; they are the article's reported keywords
+            is_severity = any(bucket in self.keyword_mappings['severity'] for bucket in keyword_buckets)
+            automaton.add_word(keyword, (keyword, tuple(keyword_buckets), is_severity))
+        automaton.make_automaton()
+        return automaton
+
+    async def fetch_company_news(self, company: str, days_back: int = 7,
+                                 limit: Optional[int] = None) -> List[NewsArticle]:
         """Fetch news for a specific company from all sources"""
-        articles = []
+        unique_articles = []
+        deduplicator = _ArticleDeduplicator()
+        company_keywords = self._company_keywords(company)
 
         # Parallel fetching from different sources
         tasks = [
-            self._fetch_from_newsapi(company, days_back),
-            self._fetch_from_newsdata(company, days_back),
-            self._fetch_from_rss_feeds(company, days_back),
-            self._fetch_from_google_rss(company, days_back)
+            self._cached_source('newsapi', self._fetch_from_newsapi, company, days_back),
+            self._cached_source('newsdata', self._fetch_from_newsdata, company, days_back),
+            self._cached_source('rss', self._fetch_from_rss_feeds, company, days_back, company_keywords),
+            self._cached_source('google_rss', self._fetch_from_google_rss, company, days_back)
         ]
 
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-
-        for result in results:
-            if isinstance(result, list):
-                articles.extend(result)
-            elif isinstance(result, Exception):
-                logger.error(f"News fetching error: {result}")
+        # Deduplicate each source as it arrives, while slower sources are still in flight
+        for next_result in asyncio.as_completed(tasks):
+            try:
+                result = await next_result
+            except Exception as e:
+                logger.error(f"News fetching error: {e}")
+                continue
+            unique_articles.extend(article for article in result if deduplicator.add(article))
 
-        # Remove duplicates and sort by relevance
-        unique_articles = self._deduplicate_articles(articles)
-        return sorted(unique_articles, key=lambda x: x.relevance_score, reverse=True)
+        # Score what is left and sort by relevance
+        await self._score_articles(unique_articles, company)
+        relevance = attrgetter('relevance_score')
+        if limit is not None:
+            return heapq.nlargest(limit, unique_articles, key=relevance)
+        return sorted(unique_articles, key=relevance, reverse=True)
 
     async def _fetch_from_newsapi(self, company: str, days_back: int) -> List[NewsArticle]:
         """Fetch from NewsAPI"""
@@ -133,18 +449,19 @@ class NewsService:
 
         try:
             # Calculate date range
-            to_date = datetime.now()
-            from_date = to_date - timedelta(days=days_back)
+            from_str, to_str = _date_range_strs(days_back, date.today())
 
             # Search for company news
-            response = self.newsapi_client.get_everything(
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(self._io_pool, functools.partial(
+                self.newsapi_client.get_everything,
                 q=f'"{company}"',
                 language='en',
                 sort_by='relevancy',
-                from_param=from_date.strftime('%Y-%m-%d'),
-                to=to_date.strftime('%Y-%m-%d'),
+                from_param=from_str,
+                to=to_str,
                 page_size=20
-            )
+            ))
 
             articles = []
             for article in response.get('articles', []):
@@ -173,36 +490,43 @@ class NewsService:
                 'size': 10
             }
 
-            async with aiohttp.ClientSession() as session:
+            session = await self._get_session()
+            async with self._fetch_sem:
                 async with session.get(url, params=params) as response:
                     if response.status == 200:
-                        data = await response.json()
-                        articles = []
-                        for article in data.get('results', []):
-                            news_article = self._parse_newsdata_article(article, company)
-                            if news_article:
-                                articles.append(news_article)
-                        return articles
+                        data = orjson.loads(await response.read())
+                    else:
+                        data = None
+
+            if data is not None:
+                articles = []
+                for article in data.get('results', []):
+                    news_article = self._parse_newsdata_article(article, company)
+                    if news_article:
+                        articles.append(news_article)
+                return articles
 
         except Exception as e:
             logger.error(f"NewsData fetch error: {e}")
 
         return []
 
-    async def _fetch_from_rss_feeds(self, company: str, days_back: int) -> List[NewsArticle]:
+    async def _fetch_from_rss_feeds(self, company: str, days_back: int,
+                                    company_keywords: Optional[Tuple[str, ...]] = None) -> List[NewsArticle]:
         """Fetch from RSS feeds"""
         articles = []
+        if company_keywords is None:
+            company_keywords = self._company_keywords(company)
 
         async def fetch_rss(feed_name, feed_url):
             try:
-                # Use asyncio to make RSS parsing non-blocking
-                loop = asyncio.get_event_loop()
-                feed = await loop.run_in_executor(None, feedparser.parse, feed_url)
+                feed = await self._fetch_feed(feed_url, max_entries=20)
 
                 feed_articles = []
+                now = datetime.now()
                 for entry in feed.entries[:20]:  # Limit per feed
-                    if self._is_company_relevant(entry, company):
-                        article = self._parse_rss_entry(entry, company, feed_name)
+                    if self._is_company_relevant(entry, company_keywords):
+                        article = self._parse_rss_entry(entry, company, feed_name, now)
                         if article:
                             feed_articles.append(article)
 
@@ -212,29 +536,25 @@ class NewsService:
                 logger.error(f"RSS fetch error for {feed_name}: {e}")
                 return []
 
-        # Fetch from all RSS feeds in parallel
+        # Fetch from all RSS feeds in parallel, collecting each as soon as it lands
         tasks = [fetch_rss(name, url) for name, url in self.rss_feeds.items()]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-
-        for result in results:
-            if isinstance(result, list):
-                articles.extend(result)
+        for next_result in asyncio.as_completed(tasks):
+            try:
+                articles.extend(await next_result)
+            except Exception as e:
+                logger.error(f"RSS fetch error: {e}")
 
         return articles
 
     async def _fetch_from_google_rss(self, company: str, days_back: int) -> List[NewsArticle]:
         """Fetch from Google News RSS"""
         try:
-            # Google News search URL
-            query = f'"{company}" OR "{company} inc" OR "{company} corp"'
-            url = f"https://news.google.com/rss/search?q={requests.utils.quote(query)}&hl=en-US&gl=US&ceid=US:en"
-
-            loop = asyncio.get_event_loop()
-            feed = await loop.run_in_executor(None, feedparser.parse, url)
+            feed = await self._fetch_feed(_google_rss_url(company), max_entries=15)
 
             articles = []
+            now = datetime.now()
             for entry in feed.entries[:15]:
-                article = self._parse_rss_entry(entry, company, 'google_news')
+                article = self._parse_rss_entry(entry, company, 'google_news', now)
                 if article:
                     articles.append(article)
 
@@ -254,17 +574,11 @@ class NewsService:
             content = article.get('content') or article.get('description', '')
             title = article.get('title', '')
 
-            return NewsArticle(
-                title=title,
-                content=content,
-                url=article.get('url', ''),
-                source=article.get('source', {}).get('name', 'Unknown'),
-                published_at=published_at,
-                company=company,
-                sentiment_score=self._calculate_sentiment(title + ' ' + content),
-                relevance_score=self._calculate_relevance(title + ' ' + content, company),
-                severity=self._assess_severity(title + ' ' + content),
-                keywords=self._extract_keywords(title + ' ' + content)
+            return self._make_article(
+                title, content,
+                article.get('url', ''),
+                article.get('source', {}).get('name', 'Unknown'),
+                published_at, company
             )
 
         except Exception as e:
@@ -279,140 +593,118 @@ class NewsService:
             content = article.get('content') or article.get('description', '')
             title = article.get('title', '')
 
-            return NewsArticle(
-                title=title,
-                content=content,
-                url=article.get('link', ''),
-                source=article.get('source_id', 'Unknown'),
-                published_at=published_at,
-                company=company,
-                sentiment_score=self._calculate_sentiment(title + ' ' + content),
-                relevance_score=self._calculate_relevance(title + ' ' + content, company),
-                severity=self._assess_severity(title + ' ' + content),
-                keywords=self._extract_keywords(title + ' ' + content)
+            return self._make_article(
+                title, content,
+                article.get('link', ''),
+                article.get('source_id', 'Unknown'),
+                published_at, company
             )
 
         except Exception as e:
             logger.error(f"Error parsing NewsData article: {e}")
             return None
 
-    def _parse_rss_entry(self, entry, company: str, source: str) -> Optional[NewsArticle]:
+    def _parse_rss_entry(self, entry, company: str, source: str,
+                         now: Optional[datetime] = None) -> Optional[NewsArticle]:
         """Parse RSS feed entry"""
         try:
             # Handle different date formats
-            published_at = datetime.now()
+            published_at = now or datetime.now()
             if hasattr(entry, 'published_parsed') and entry.published_parsed:
                 published_at = datetime(*entry.published_parsed[:6])
             elif hasattr(entry, 'published'):
                 try:
-                    published_at = datetime.strptime(entry.published, '%a, %d %b %Y %H:%M:%S %Z')
-                except:
+                    # RFC 2822, as used by RSS; normalised to naive UTC like published_parsed
+                    parsed = parsedate_to_datetime(entry.published)
+                    if parsed.tzinfo is not None:
+                        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+                    published_at = parsed
+                except (TypeError, ValueError):
                     pass
 
             content = getattr(entry, 'summary', '') or getattr(entry, 'description', '')
             title = getattr(entry, 'title', '')
 
-            return NewsArticle(
-                title=title,
-                content=content,
-                url=getattr(entry, 'link', ''),
-                source=source,
-                published_at=published_at,
-                company=company,
-                sentiment_score=self._calculate_sentiment(title + ' ' + content),
-                relevance_score=self._calculate_relevance(title + ' ' + content, company),
-                severity=self._assess_severity(title + ' ' + content),
-                keywords=self._extract_keywords(title + ' ' + content)
+            return self._make_article(
+                title, content,
+                getattr(entry, 'link', ''),
+                source,
+                published_at, company
             )
 
         except Exception as e:
             logger.error(f"Error parsing RSS entry: {e}")
             return None
 
-    def _is_company_relevant(self, entry, company: str) -> bool:
+    def _make_article(self, title: str, content: str, url: str, source: str,
+                      published_at: datetime, company: str) -> NewsArticle:
+        """Build an unscored article; scoring happens in one pass after deduplication"""
+        return NewsArticle(
+            title=title,
+            content=content,
+            url=url,
+            source=source,
+            published_at=published_at,
+            company=company
+        )
+
+    def _company_keywords(self, company: str) -> Tuple[str, ...]:
+        """Search terms for a company, looked up once per company"""
+        keywords = self._company_keyword_cache.get(company)
+        if keywords is None:
+            company_lower = company.lower()
+            keywords = tuple(self.keyword_mappings['companies'].get(company_lower, (company_lower,)))
+            self._company_keyword_cache[company] = keywords
+        return keywords
+
+    def _is_company_relevant(self, entry, company_keywords: Tuple[str, ...]) -> bool:
         """Check if RSS entry is relevant to the company"""
-        text = (getattr(entry, 'title', '') + ' ' + getattr(entry, 'summary', '')).lower()
-        company_keywords = self.keyword_mappings['companies'].get(company.lower(), [company.lower()])
-
-        return any(keyword in text for keyword in company_keywords)
-
-    def _calculate_sentiment(self, text: str) -> float:
-        """Simple sentiment analysis"""
-        positive_words = ['success', 'growth', 'profit', 'win', 'achievement', 'positive', 'good', 'excellent']
-        negative_words = ['failure', 'loss', 'scandal', 'problem', 'bad', 'negative', 'crisis', 'controversy']
-
-        text_lower = text.lower()
-        positive_count = sum(1 for word in positive_words if word in text_lower)
-        negative_count = sum(1 for word in negative_words if word in text_lower)
-
-        total_words = len(text.split())
-        if total_words == 0:
-            return 0.0
+        return _mentions_company(getattr(entry, 'title', ''), getattr(entry, 'summary', ''), company_keywords)
 
-        sentiment = (positive_count - negative_count) / max(total_words / 10, 1)
-        return max(-1.0, min(1.0, sentiment))
-
-    def _calculate_relevance(self, text: str, company: str) -> float:
-        """Calculate article relevance to company"""
-        text_lower = text.lower()
-        company_keywords = self.keyword_mappings['companies'].get(company.lower(), [company.lower()])
-
-        # Count company mentions
-        mention_count = sum(text_lower.count(keyword) for keyword in company_keywords)
+    async def _score_articles(self, articles: List[NewsArticle], company: str) -> List[NewsArticle]:
+        """Fill in sentiment, relevance, severity and keywords for a batch of articles"""
+        if not articles:
+            return articles
 
-        # Boost score for business-relevant terms
-        business_terms = ['financial', 'earnings', 'revenue', 'stock', 'shares', 'market', 'business', 'corporate']
-        business_count = sum(1 for term in business_terms if term in text_lower)
+        company_keywords = self._company_keywords(company)
+        texts = [f"{article.title} {article.content}" for article in articles]
 
-        relevance_score = (mention_count * 0.5) + (business_count * 0.1)
-        return min(1.0, relevance_score)
+        # Large refreshes are scanned in worker processes so the event loop stays responsive
+        if len(texts) >= SCORING_PROCESS_MIN_BATCH:
+            loop = asyncio.get_running_loop()
+            scans = await loop.run_in_executor(self.scoring_executor, _scan_texts_in_worker, texts, company_keywords)
+        else:
+            scans = _scan_texts(self._keyword_automaton, texts, company_keywords)
 
-    def _assess_severity(self, text: str) -> str:
-        """Assess news severity"""
-        text_lower = text.lower()
+        counts = np.array([scan[0] for scan in scans], dtype=np.int32)
+        word_counts = np.array([scan[1] for scan in scans], dtype=np.float64)
+        mention_counts = np.array([scan[2] for scan in scans], dtype=np.float64)
+        for article, scan in zip(articles, scans):
+            article.keywords = scan[3]
 
-        high_count = sum(1 for keyword in self.keyword_mappings['severity']['high'] if keyword in text_lower)
-        medium_count = sum(1 for keyword in self.keyword_mappings['severity']['medium'] if keyword in text_lower)
-
-        if high_count >= 2:
-            return "HIGH"
-        elif high_count >= 1:
-            return "HIGH"
-        elif medium_count >= 2:
-            return "MEDIUM"
-        elif medium_count >= 1:
-            return "MEDIUM"
-        else:
-            return "LOW"
+        high, medium, _, positive, negative, business = counts.T
 
-    def _extract_keywords(self, text: str) -> List[str]:
-        """Extract relevant keywords from text"""
-        all_keywords = []
-        for severity_level in self.keyword_mappings['severity'].values():
-            all_keywords.extend(severity_level)
+        # Simple sentiment analysis
+        sentiment = np.clip((positive - negative) / np.maximum(word_counts / 10, 1), -1.0, 1.0)
+        relevance = np.minimum(1.0, mention_counts * 0.5 + business * 0.1)
+        severity = np.where(high > 0, "HIGH", np.where(medium > 0, "MEDIUM", "LOW"))
 
-        text_lower = text.lower()
-        found_keywords = [keyword for keyword in all_keywords if keyword in text_lower]
+        for article, article_sentiment, article_relevance, article_severity in zip(
+            articles, sentiment.tolist(), relevance.tolist(), severity.tolist()
+        ):
+            article.sentiment_score = article_sentiment
+            article.relevance_score = article_relevance
+            article.severity = article_severity
 
-        return list(set(found_keywords))  # Remove duplicates
+        return articles
 
     def _deduplicate_articles(self, articles: List[NewsArticle]) -> List[NewsArticle]:
         """Remove duplicate articles based on title similarity"""
         if not articles:
             return []
 
-        unique_articles = []
-        seen_titles = set()
-
-        for article in articles:
-            # Simple deduplication based on first 50 characters of title
-            title_key = article.title[:50].lower().strip()
-
-            if title_key not in seen_titles:
-                seen_titles.add(title_key)
-                unique_articles.append(article)
-
-        return unique_articles
+        deduplicator = _ArticleDeduplicator()
+        return [article for article in articles if deduplicator.add(article)]
 
     def get_trending_companies(self, limit: int = 10) -> List[Dict]:
         """Get trending companies in news"""
@@ -438,5 +730,7 @@ async def test_news_service():
     for article in articles[:5]:
         print(f"- {article.title} ({article.severity}) - {article.source}")
 
+    await service.close()
+
 if __name__ == "__main__":
     asyncio.run(test_news_service())
\ No newline at end of file
@@ -1,19 +1,57 @@
 import os
 import numpy as np
 import faiss
+import ahocorasick
 import pickle
 from typing import List, Dict, Tuple, Optional
 from dataclasses import dataclass, asdict
 from sentence_transformers import SentenceTransformer
-import json
+import torch
+import orjson
+from collections import Counter, OrderedDict, defaultdict
+from functools import wraps
 import hashlib
+import threading
+import zlib
+import platform
 from pathlib import Path
 import logging
 from datetime import datetime
 
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Flat scans over a query batch are split across cores by FAISS's OpenMP loops
+faiss.omp_set_num_threads(os.cpu_count() or 1)
+
+# Index tiers by store size: exact float32 scan, then int8 scalar quantization (a quarter
+# of the memory and scan bandwidth), then IVF+PQ. 256 lists x 39 points is the minimum
+# FAISS wants for training both the coarse quantizer and the PQ codebooks.
+SQ8_MIN_VECTORS = 1000
+IVF_MIN_VECTORS = 9984
+# 4-bit PQ codes in FastScan layout (24 bytes/vector); distances come from in-register
+# lookup-table shuffles, and the top candidates are rescored against stored embeddings
+IVF_FACTORY = "IVF256,PQ48x4fs"
+RESCORE_MULTIPLIER = 2
+DEFAULT_NPROBE = 8
+
+# Single-document adds are staged and handed to FAISS in blocks of this many rows
+ADD_BUFFER_ROWS = 1024
+
+MAX_SEQ_LENGTH = 128
+EMBED_CACHE_SIZE = 1024
+EMBED_CACHE_MAX_CHARS = 1000
+
+# 1/position weights for the hash-embedding fallback
+_POSITION_WEIGHTS = 1.0 / np.arange(1, 51, dtype=np.float32)
+
 @dataclass
 class Document:
     id: str
@@ -29,35 +67,206 @@ class Document:
             # Note: embedding excluded from dict for JSON serialization
         }
 
+def _onnx_int8_file() -> str:
+    """Pick the int8 ONNX build of MiniLM that matches this CPU's vector extensions"""
+    try:
+        with open('/proc/cpuinfo') as f:
+            flags = f.read()
+    except OSError:
+        flags = ''
+    if 'avx512_vnni' in flags:
+        return 'onnx/model_qint8_avx512_vnni.onnx'
+    if 'avx512f' in flags:
+        return 'onnx/model_qint8_avx512.onnx'
+    if platform.machine() in ('arm64', 'aarch64'):
+        return 'onnx/model_qint8_arm64.onnx'
+    return 'onnx/model_quint8_avx2.onnx'
+
+def _tune_model(model: SentenceTransformer) -> SentenceTransformer:
+    """Shorter padding, FP16 on GPU and all cores on CPU for faster encodes"""
+    # Company-document chunks are short; 128 tokens avoids padding to the default 256
+    model.max_seq_length = MAX_SEQ_LENGTH
+    if torch.cuda.is_available():
+        model = model.to('cuda').half()
+    else:
+        torch.set_num_threads(os.cpu_count() or 1)
+    return model
+
+def _gpu_resources():
+    """FAISS GPU resources if this build has GPU support and a device is present"""
+    if not hasattr(faiss, 'StandardGpuResources'):
+        return None
+    try:
+        if faiss.get_num_gpus() > 0:
+            return faiss.StandardGpuResources()
+    except RuntimeError as e:
+        logger.warning(f"FAISS GPU initialization failed: {e}")
+    return None
+
+def _faiss_id(doc_id: str) -> int:
+    """Stable signed 64-bit FAISS id for a document id"""
+    return int.from_bytes(hashlib.blake2b(doc_id.encode(), digest_size=8).digest(), 'big', signed=True)
+
+def _temp_path(path: str) -> str:
+    """Temporary name beside path, unique per process and thread so writers never share one"""
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+def _remove_quietly(path: str):
+    """Delete a leftover temporary file, ignoring errors"""
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def _synchronized(method):
+    """Run a VectorStore method under the store's lock"""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+def _cache_key(text: str) -> str:
+    """Normalize text for the embedding cache; MiniLM is uncased, so case doesn't change the vector"""
+    return text.strip().lower()
+
 class VectorStore:
-    def __init__(self, dimension: int = 384, index_file: str = "vector_index.faiss"):
+    def __init__(self, dimension: int = 384, index_file: str = "vector_index.faiss", nprobe: int = DEFAULT_NPROBE):
         self.dimension = dimension
+        self.nprobe = nprobe
         self.index_file = index_file
         self.metadata_file = index_file.replace('.faiss', '_metadata.json')
+        self.parquet_file = index_file.replace('.faiss', '_metadata.parquet')
+        self.embeddings_file = index_file.replace('.faiss', '_embeddings.npy')
+        # Saves run in worker threads; reentrant because mutators call flush and rebuild_index
+        self._lock = threading.RLock()
 
         # Initialize embedding model (free alternative to OpenAI)
         self.embedding_model = self._load_embedding_model()
+        self._embedding_cache: OrderedDict = OrderedDict()  # normalized text -> embedding
 
-        # Initialize FAISS index
-        self.index = faiss.IndexFlatIP(dimension)  # Inner product for cosine similarity
+        # Initialize FAISS index; with CUDA, unfiltered searches run on a GPU copy
+        self._gpu_resources = _gpu_resources()
+        self._gpu_index = None
+        self.index = self._new_index(0)
         self.documents = {}  # id -> Document mapping
-        self.id_to_index = {}  # id -> faiss index mapping
+        self._faiss_ids: Dict[int, str] = {}  # int64 faiss id -> document id
+        self._company_ids: Dict[str, set] = defaultdict(set)  # company -> faiss ids
+        self._company_selectors: Dict[str, faiss.IDSelectorBatch] = {}
+        # Documents per company / type, for get_stats
+        self._company_counts: Counter = Counter()
+        self._type_counts: Counter = Counter()
+        self._add_buffer = np.empty((ADD_BUFFER_ROWS, dimension), dtype=np.float32)
+        self._add_buffer_ids = np.empty(ADD_BUFFER_ROWS, dtype=np.int64)
+        self._buffered = 0
 
         # Load existing index if available
         self._load_index()
 
+    @property
+    def index(self) -> faiss.Index:
+        return self._index
+
+    @index.setter
+    def index(self, index: faiss.Index):
+        self._index = index
+        self._gpu_index = None
+        self._index_mmapped = False
+
+    def _ensure_writable(self):
+        """Swap a memory-mapped (read-only) index for an in-memory copy before modifying it"""
+        if self._index_mmapped:
+            self.index = faiss.read_index(self.index_file)
+            self._set_nprobe(self.index)
+            logger.info("Loaded vector index into memory for writing")
+
+    def _search_index(self) -> faiss.Index:
+        """GPU mirror of the index when available, refreshed after writes; the CPU index otherwise"""
+        if self._gpu_resources is None:
+            return self.index
+        if self._gpu_index is None:
+            try:
+                self._gpu_index = faiss.index_cpu_to_gpu(self._gpu_resources, 0, self.index)
+            except RuntimeError as e:
+                # Not every index type has a GPU implementation (e.g. flat SQ8)
+                logger.debug(f"GPU copy of {type(self.index).__name__} unavailable, searching on CPU: {e}")
+                self._gpu_index = self.index
+        return self._gpu_index
+
+    @staticmethod
+    def _index_tier(num_vectors: int) -> int:
+        """0 = flat, 1 = SQ8, 2 = IVF+PQ"""
+        if num_vectors >= IVF_MIN_VECTORS:
+            return 2
+        if num_vectors >= SQ8_MIN_VECTORS:
+            return 1
+        return 0
+
+    @staticmethod
+    def _tier_of(index: faiss.Index) -> int:
+        """Which tier an existing index belongs to"""
+        if isinstance(index, faiss.IndexIDMap2):
+            index = faiss.downcast_index(index.index)
+        if isinstance(index, faiss.IndexFlat):
+            return 0
+        if isinstance(index, faiss.IndexScalarQuantizer):
+            return 1
+        return 2
+
+    def _new_index(self, num_vectors: int) -> faiss.Index:
+        """Pick the index type for a store of this size; quantized tiers need training before add"""
+        tier = self._index_tier(num_vectors)
+        if tier == 0:
+            base = faiss.IndexFlatIP(self.dimension)  # Inner product for cosine similarity
+        elif tier == 1:
+            base = faiss.IndexScalarQuantizer(
+                self.dimension, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT
+            )
+        else:
+            base = faiss.index_factory(self.dimension, IVF_FACTORY, faiss.METRIC_INNER_PRODUCT)
+            self._set_nprobe(base)
+
+        # Vectors are addressed by a hash of the document id, so deletes and
+        # replacements can go straight to FAISS
+        return faiss.IndexIDMap2(base)
+
+    def _set_nprobe(self, index: faiss.Index):
+        """Apply the configured nprobe if the index is an IVF index"""
+        try:
+            ivf = faiss.extract_index_ivf(index)
+        except RuntimeError:
+            return
+        ivf.nprobe = self.nprobe
+        if hasattr(ivf, 'use_precomputed_table'):
+            # Precomputed tables only help L2 IVFPQ and can cost hundreds of MB
+            ivf.use_precomputed_table = 0
+
     def _load_embedding_model(self):
         """Load free sentence transformer model"""
+        if not torch.cuda.is_available():
+            try:
+                # Dynamically quantized int8 ONNX export shipped with the model; no PyTorch on the hot path
+                model = SentenceTransformer(
+                    'all-MiniLM-L6-v2',
+                    backend='onnx',
+                    model_kwargs={'file_name': _onnx_int8_file(), 'provider': 'CPUExecutionProvider'}
+                )
+                model.max_seq_length = MAX_SEQ_LENGTH
+                logger.info("Loaded sentence transformer model: all-MiniLM-L6-v2 (ONNX int8)")
+                return model
+            except Exception as e:
+                logger.warning(f"ONNX int8 model unavailable, using PyTorch: {e}")
+
         try:
             # Using all-MiniLM-L6-v2: 384 dimensions, good performance, fast
-            model = SentenceTransformer('all-MiniLM-L6-v2')
+            model = _tune_model(SentenceTransformer('all-MiniLM-L6-v2'))
             logger.info("Loaded sentence transformer model: all-MiniLM-L6-v2")
             return model
         except Exception as e:
             logger.error(f"Failed to load embedding model: {e}")
             # Fallback to even smaller model
             try:
-                model = SentenceTransformer('all-MiniLM-L12-v2')
+                model = _tune_model(SentenceTransformer('all-MiniLM-L12-v2'))
                 logger.info("Loaded fallback model: all-MiniLM-L12-v2")
                 return model
             except Exception as e2:
@@ -65,38 +274,89 @@ class VectorStore:
                 return None
 
     def embed_text(self, text: str) -> np.ndarray:
-        """Generate embedding for text"""
+        """Generate embedding for text; repeats are served from an LRU cache (read-only arrays)"""
+        key = _cache_key(text)
+        cached = self._embedding_cache.get(key)
+        if cached is not None:
+            self._embedding_cache.move_to_end(key)
+            return cached
+
         if not self.embedding_model:
-            return self._simple_embedding(text)
+            embedding = self._simple_embedding(key)
+        else:
+            try:
+                embedding = self._encode_batch_model([key])[0]
+            except Exception as e:
+                logger.error(f"Embedding generation failed: {e}")
+                embedding = self._simple_embedding(key)
+
+        self._remember_embedding(key, embedding)
+        return embedding
+
+    def embed_text_batch(self, texts: List[str]) -> np.ndarray:
+        """Embed many texts, encoding each distinct uncached text once"""
+        keys = [_cache_key(text) for text in texts]
+        found = {key: self._embedding_cache[key] for key in keys if key in self._embedding_cache}
+        missing = [key for key in dict.fromkeys(keys) if key not in found]
+        for key, embedding in zip(missing, self._encode_batch(missing)):
+            found[key] = embedding
+            self._remember_embedding(key, embedding)
+
+        embeddings = np.empty((len(keys), self.dimension), dtype=np.float32)
+        for row, key in enumerate(keys):
+            embeddings[row] = found[key]
+        return embeddings
+
+    def _remember_embedding(self, key: str, embedding: np.ndarray):
+        """Cache an embedding for short texts such as queries; long document bodies are not kept"""
+        if len(key) > EMBED_CACHE_MAX_CHARS:
+            return
+        embedding.flags.writeable = False
+        self._embedding_cache[key] = embedding
+        if len(self._embedding_cache) > EMBED_CACHE_SIZE:
+            self._embedding_cache.popitem(last=False)
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        """Generate embeddings for many texts with one batched encode call"""
+        if not texts:
+            return np.empty((0, self.dimension), dtype=np.float32)
+
+        if self.embedding_model:
+            try:
+                return self._encode_batch_model(texts)
+            except Exception as e:
+                logger.error(f"Batch embedding generation failed: {e}")
 
-        try:
-            embedding = self.embedding_model.encode(text, normalize_embeddings=True)
-            return embedding.astype(np.float32)
-        except Exception as e:
-            logger.error(f"Embedding generation failed: {e}")
-            return self._simple_embedding(text)
+        return np.stack([self._simple_embedding(text) for text in texts])
+
+    def _encode_batch_model(self, texts: List[str]) -> np.ndarray:
+        """Encode with the model and L2-normalize the whole matrix in place with FAISS"""
+        embeddings = self.embedding_model.encode(
+            texts, batch_size=64, normalize_embeddings=False, convert_to_numpy=True
+        )
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        faiss.normalize_L2(embeddings)
+        return embeddings
 
     def _simple_embedding(self, text: str) -> np.ndarray:
         """Fallback simple embedding using TF-IDF like approach"""
         # This is a very basic fallback - in production you'd want a better alternative
-        words = text.lower().split()
+        words = text.lower().split()[:50]  # Limit to first 50 words
 
-        # Create a simple hash-based embedding
-        embedding = np.zeros(self.dimension)
-
-        for i, word in enumerate(words[:50]):  # Limit to first 50 words
-            # Simple hash to index mapping
-            hash_val = int(hashlib.md5(word.encode()).hexdigest(), 16)
-            idx = hash_val % self.dimension
-            embedding[idx] += 1.0 / (i + 1)  # Weight by position
+        # Create a simple hash-based embedding; crc32 is stable across processes, unlike hash()
+        embedding = np.zeros(self.dimension, dtype=np.float32)
+        if words:
+            idxs = np.fromiter((zlib.crc32(word.encode()) for word in words), dtype=np.int64, count=len(words))
+            np.add.at(embedding, idxs % self.dimension, _POSITION_WEIGHTS[:len(words)])  # Weight by position
 
         # Normalize
         norm = np.linalg.norm(embedding)
         if norm > 0:
-            embedding = embedding / norm
+            embedding /= norm
 
-        return embedding.astype(np.float32)
+        return embedding
 
+    @_synchronized
     def add_document(self, doc_id: str, content: str, metadata: Dict) -> str:
         """Add a document to the vector store"""
         try:
@@ -111,13 +371,22 @@ class VectorStore:
                 embedding=embedding
             )
 
-            # Add to FAISS index
-            index_id = self.index.ntotal
-            self.index.add(embedding.reshape(1, -1))
+            # Re-adding a document replaces its vector
+            faiss_id = _faiss_id(doc_id)
+            self._remove_vectors([faiss_id])
+
+            # Queue for the FAISS index; rows are added in blocks by flush()
+            self._add_buffer[self._buffered] = embedding
+            self._add_buffer_ids[self._buffered] = faiss_id
+            self._buffered += 1
+            if self._buffered == ADD_BUFFER_ROWS:
+                self.flush()
 
             # Store mappings
+            self._forget_document(doc_id)
             self.documents[doc_id] = document
-            self.id_to_index[doc_id] = index_id
+            self._track_document(document, faiss_id)
+            self._maybe_upgrade_index()
 
             logger.info(f"Added document {doc_id} to vector store")
             return doc_id
@@ -126,64 +395,216 @@ class VectorStore:
             logger.error(f"Failed to add document {doc_id}: {e}")
             raise e
 
+    @_synchronized
+    def flush(self):
+        """Add queued single-document embeddings to the FAISS index"""
+        if self._buffered:
+            self._ensure_writable()
+            self.index.add_with_ids(self._add_buffer[:self._buffered], self._add_buffer_ids[:self._buffered])
+            self._gpu_index = None
+            self._buffered = 0
+
+    def _track_document(self, document: Document, faiss_id: int):
+        """Record a stored document in the id and per-company lookups"""
+        self._faiss_ids[faiss_id] = document.id
+        self._company_counts[document.metadata.get('company', 'Unknown')] += 1
+        self._type_counts[document.metadata.get('type', 'Unknown')] += 1
+        company = document.metadata.get('company')
+        if company is not None:
+            self._company_ids[company].add(faiss_id)
+            self._company_selectors.pop(company, None)
+
+    def _forget_document(self, doc_id: str):
+        """Drop an existing document from the id and per-company lookups"""
+        document = self.documents.get(doc_id)
+        if document is None:
+            return
+        faiss_id = _faiss_id(doc_id)
+        self._faiss_ids.pop(faiss_id, None)
+        for counts, key in ((self._company_counts, 'company'), (self._type_counts, 'type')):
+            value = document.metadata.get(key, 'Unknown')
+            counts[value] -= 1
+            if counts[value] <= 0:
+                del counts[value]
+        company = document.metadata.get('company')
+        if company is not None:
+            self._company_ids[company].discard(faiss_id)
+            self._company_selectors.pop(company, None)
+
+    def _reset_lookups(self):
+        """Rebuild the id and per-company lookups from self.documents"""
+        self._faiss_ids = {}
+        self._company_ids = defaultdict(set)
+        self._company_selectors = {}
+        self._company_counts = Counter()
+        self._type_counts = Counter()
+        for doc_id, document in self.documents.items():
+            self._track_document(document, _faiss_id(doc_id))
+
+    def _company_search_params(self, company: str) -> Optional[faiss.SearchParameters]:
+        """Search parameters restricting FAISS to one company's vectors"""
+        selector = self._company_selectors.get(company)
+        if selector is None:
+            faiss_ids = np.fromiter(self._company_ids.get(company, ()), dtype=np.int64)
+            selector = faiss.IDSelectorBatch(faiss_ids)
+            self._company_selectors[company] = selector
+
+        if self._tier_of(self.index) == 2:
+            return faiss.SearchParametersIVF(sel=selector, nprobe=self.nprobe)
+        return faiss.SearchParameters(sel=selector)
+
+    def _remove_vectors(self, faiss_ids: List[int]):
+        """Drop the stored vectors for these ids, if any"""
+        present = [faiss_id for faiss_id in faiss_ids if faiss_id in self._faiss_ids]
+        if not present:
+            return
+        self.flush()
+        self._ensure_writable()
+        try:
+            self.index.remove_ids(np.array(present, dtype=np.int64))
+            self._gpu_index = None
+        except RuntimeError as e:
+            # Not every index type supports removal; stale rows are skipped at search time
+            logger.warning(f"Could not remove vectors from index: {e}")
+
+    @_synchronized
     def add_documents(self, documents: List[Tuple[str, str, Dict]]) -> List[str]:
         """Add multiple documents at once"""
-        doc_ids = []
+        if not documents:
+            return []
 
-        for doc_id, content, metadata in documents:
-            try:
-                added_id = self.add_document(doc_id, content, metadata)
-                doc_ids.append(added_id)
-            except Exception as e:
-                logger.error(f"Failed to add document {doc_id}: {e}")
+        # Later entries for the same id win, as with repeated add_document calls
+        batch = {doc_id: (content, metadata) for doc_id, content, metadata in documents}
+        doc_ids = list(batch)
+        faiss_ids = np.fromiter((_faiss_id(doc_id) for doc_id in doc_ids), dtype=np.int64, count=len(doc_ids))
+
+        try:
+            # One encode call and one FAISS add for the whole batch
+            embeddings = self.embed_text_batch([content for content, _ in batch.values()])
+            self._remove_vectors(faiss_ids.tolist())
+            self.flush()
+            self._ensure_writable()
+            self.index.add_with_ids(embeddings, faiss_ids)
+            self._gpu_index = None
+        except Exception as e:
+            logger.error(f"Failed to add {len(documents)} documents: {e}")
+            return []
 
+        for doc_id, faiss_id, (content, metadata), embedding in zip(
+            doc_ids, faiss_ids.tolist(), batch.values(), embeddings
+        ):
+            self._forget_document(doc_id)
+            self.documents[doc_id] = Document(
+                id=doc_id,
+                content=content,
+                metadata=metadata,
+                embedding=embedding
+            )
+            self._track_document(self.documents[doc_id], faiss_id)
+
+        logger.info(f"Added {len(doc_ids)} documents to vector store")
+        self._maybe_upgrade_index()
         return doc_ids
 
+    def _maybe_upgrade_index(self):
+        """Rebuild into the next index tier once the store has grown past its threshold"""
+        if self._index_tier(len(self.documents)) > self._tier_of(self.index):
+            self.rebuild_index()
+
     def search(self, query: str, k: int = 5, filter_metadata: Optional[Dict] = None) -> List[Dict]:
         """Search for similar documents"""
-        try:
-            # Generate query embedding
-            query_embedding = self.embed_text(query)
+        return self.search_batch([query], k, filter_metadata)[0]
 
-            # Search in FAISS
-            scores, indices = self.index.search(query_embedding.reshape(1, -1), min(k * 2, self.index.ntotal))
+    def search_batch(self, queries: List[str], k: int = 5, filter_metadata: Optional[Dict] = None) -> List[List[Dict]]:
+        """Search for several queries with one encode and one FAISS call"""
+        try:
+            # Generate query embeddings
+            query_matrix = self.embed_text_batch(queries)
+            self.flush()
+
+            # PQ scores are approximate, so over-fetch and rescore exactly
+            rescore = self._tier_of(self.index) == 2
+            multiplier = RESCORE_MULTIPLIER if rescore else 1
+
+            # Search in FAISS, restricted to the company's vectors when filtering by company
+            scores = indices = None
+            company = (filter_metadata or {}).get('company')
+            if company is not None:
+                candidates = len(self._company_ids.get(company, ()))
+                if candidates == 0:
+                    return [[] for _ in queries]
+                # Only non-company filter keys can still reject hits
+                fetch = (k if len(filter_metadata) == 1 else k * 2) * multiplier
+                try:
+                    scores, indices = self.index.search(
+                        query_matrix, min(fetch, candidates), params=self._company_search_params(company)
+                    )
+                except RuntimeError as e:
+                    # Not every index type accepts ID selectors; fall back to filtering hits afterwards
+                    logger.debug(f"Selector search unsupported, post-filtering instead: {e}")
+            if scores is None:
+                scores, indices = self._search_index().search(
+                    query_matrix, min(k * 2 * multiplier, self.index.ntotal)
+                )
 
             results = []
-            for score, idx in zip(scores[0], indices[0]):
-                if idx == -1:  # FAISS returns -1 for empty slots
-                    continue
-
-                # Find document by index
-                doc_id = None
-                for did, doc_idx in self.id_to_index.items():
-                    if doc_idx == idx:
-                        doc_id = did
-                        break
-
-                if doc_id and doc_id in self.documents:
-                    document = self.documents[doc_id]
-
-                    # Apply metadata filter if provided
-                    if filter_metadata:
-                        if not self._matches_filter(document.metadata, filter_metadata):
-                            continue
-
-                    result = {
-                        'id': document.id,
-                        'content': document.content,
-                        'metadata': document.metadata,
-                        'score': float(score)
-                    }
-                    results.append(result)
-
-                    if len(results) >= k:
-                        break
-
+            for query_vector, query_scores, query_indices in zip(query_matrix, scores, indices):
+                if rescore:
+                    query_scores, query_indices = self._rescore(query_vector, query_scores, query_indices)
+                results.append(self._collect_results(query_scores, query_indices, k, filter_metadata))
             return results
 
         except Exception as e:
             logger.error(f"Search failed: {e}")
-            return []
+            return [[] for _ in queries]
+
+    def _rescore(self, query: np.ndarray, scores: np.ndarray, indices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Replace approximate scores with exact inner products from stored embeddings and re-sort"""
+        exact = scores.copy()
+        for position, idx in enumerate(indices):
+            doc_id = self._faiss_ids.get(int(idx)) if idx != -1 else None
+            document = self.documents.get(doc_id) if doc_id else None
+            if document is not None and document.embedding is not None:
+                exact[position] = float(np.dot(document.embedding, query))
+        order = np.argsort(-exact, kind='stable')
+        return exact[order], indices[order]
+
+    def _collect_results(self, scores: np.ndarray, indices: np.ndarray, k: int,
+                         filter_metadata: Optional[Dict]) -> List[Dict]:
+        """Turn one query's FAISS hits into result dicts"""
+        results = []
+        seen = set()
+        for score, idx in zip(scores, indices):
+            if idx == -1:  # FAISS returns -1 for empty slots
+                continue
+
+            doc_id = self._faiss_ids.get(int(idx))
+
+            # A vector that couldn't be removed may share its id with the replacement
+            if doc_id in seen:
+                continue
+            seen.add(doc_id)
+
+            if doc_id and doc_id in self.documents:
+                document = self.documents[doc_id]
+
+                # Apply metadata filter if provided
+                if filter_metadata:
+                    if not self._matches_filter(document.metadata, filter_metadata):
+                        continue
+
+                result = {
+                    'id': document.id,
+                    'content': document.content,
+                    'metadata': document.metadata,
+                    'score': float(score)
+                }
+                results.append(result)
+
+                if len(results) >= k:
+                    break
+
+        return results
 
     def _matches_filter(self, metadata: Dict, filter_metadata: Dict) -> bool:
         """Check if metadata matches filter criteria"""
@@ -196,6 +617,7 @@ class VectorStore:
         """Get document by ID"""
         return self.documents.get(doc_id)
 
+    @_synchronized
     def update_document(self, doc_id: str, content: str = None, metadata: Dict = None):
         """Update an existing document"""
         if doc_id not in self.documents:
@@ -209,69 +631,159 @@ class VectorStore:
             # Regenerate embedding
             document.embedding = self.embed_text(content)
 
-            # Update in FAISS index
-            index_id = self.id_to_index[doc_id]
-            # Note: FAISS doesn't support in-place updates easily
-            # For simplicity, we'll rebuild the index if needed
+            # Replace the vector in the FAISS index
+            faiss_id = _faiss_id(doc_id)
+            self._remove_vectors([faiss_id])
+            self._ensure_writable()
+            self.index.add_with_ids(document.embedding.reshape(1, -1), np.array([faiss_id], dtype=np.int64))
+            self._gpu_index = None
+
+            # The cached promise bitmask describes the old content
+            if 'promise_flags' in document.metadata:
+                document.metadata['promise_flags'] = _promise_flags(content)
 
         # Update metadata if provided
         if metadata is not None:
+            self._forget_document(doc_id)
             document.metadata.update(metadata)
+            self._track_document(document, _faiss_id(doc_id))
 
         logger.info(f"Updated document {doc_id}")
 
+    @_synchronized
     def delete_document(self, doc_id: str):
         """Delete a document (mark as deleted)"""
         if doc_id in self.documents:
-            # For simplicity, just remove from our mappings
-            # FAISS index will still contain the embedding but it won't be found
+            faiss_id = _faiss_id(doc_id)
+            self._remove_vectors([faiss_id])
+            self._forget_document(doc_id)
             del self.documents[doc_id]
-            if doc_id in self.id_to_index:
-                del self.id_to_index[doc_id]
             logger.info(f"Deleted document {doc_id}")
 
+    @_synchronized
     def save_index(self):
         """Save the index and metadata to disk"""
         try:
             # Save FAISS index
-            faiss.write_index(self.index, self.index_file)
+            self.flush()
+            # Write beside the old file and swap, since the loaded index may be mapped from it
+            tmp_file = _temp_path(self.index_file)
+            try:
+                faiss.write_index(self.index, tmp_file)
+                os.replace(tmp_file, self.index_file)
+            except Exception:
+                _remove_quietly(tmp_file)
+                raise
 
             # Save metadata and mappings
-            metadata_to_save = {
-                'documents': {doc_id: doc.to_dict() for doc_id, doc in self.documents.items()},
-                'id_to_index': self.id_to_index
-            }
+            if PYARROW_AVAILABLE:
+                self._save_parquet_metadata()
+            else:
+                metadata_to_save = {
+                    'documents': {doc_id: doc.to_dict() for doc_id, doc in self.documents.items()}
+                }
+
+                with open(self.metadata_file, 'wb') as f:
+                    f.write(orjson.dumps(metadata_to_save, option=orjson.OPT_SERIALIZE_NUMPY))
 
-            with open(self.metadata_file, 'w') as f:
-                json.dump(metadata_to_save, f, indent=2)
+            self._save_embeddings()
 
             logger.info(f"Saved vector store to {self.index_file}")
 
         except Exception as e:
             logger.error(f"Failed to save index: {e}")
 
+    def _save_embeddings(self):
+        """Write document embeddings, in document order, so rebuilds don't re-encode"""
+        if any(doc.embedding is None for doc in self.documents.values()):
+            # An incomplete sidecar would be misaligned; leave rebuilds to fill the gaps
+            if os.path.exists(self.embeddings_file):
+                os.remove(self.embeddings_file)
+            return
+
+        matrix = np.empty((len(self.documents), self.dimension), dtype=np.float32)
+        for row, document in enumerate(self.documents.values()):
+            matrix[row] = document.embedding
+
+        # Write beside the old file and swap, since loaded embeddings may be views into it
+        tmp_file = _temp_path(self.embeddings_file)
+        try:
+            with open(tmp_file, 'wb') as f:
+                np.save(f, matrix)
+            os.replace(tmp_file, self.embeddings_file)
+        except Exception:
+            _remove_quietly(tmp_file)
+            raise
+
+    def _attach_embeddings(self):
+        """Point loaded documents at rows of the memory-mapped embeddings sidecar"""
+        if not os.path.exists(self.embeddings_file):
+            return
+        matrix = np.load(self.embeddings_file, mmap_mode='r')
+        if matrix.shape != (len(self.documents), self.dimension):
+            logger.warning(f"Ignoring {self.embeddings_file}: shape {matrix.shape} doesn't match store")
+            return
+        for row, document in enumerate(self.documents.values()):
+            document.embedding = matrix[row]
+
+    def _save_parquet_metadata(self):
+        """Write documents and mappings as a zstd-compressed columnar table"""
+        documents = list(self.documents.values())
+        table = pa.table({
+            'id': [doc.id for doc in documents],
+            'content': [doc.content for doc in documents],
+            'metadata': [orjson.dumps(doc.metadata, option=orjson.OPT_SERIALIZE_NUMPY).decode() for doc in documents]
+        })
+        pq.write_table(table, self.parquet_file, compression='zstd')
+
+    def _read_metadata(self) -> Optional[Tuple[Dict[str, Document], Dict[str, int]]]:
+        """Read saved documents, plus row positions from stores saved before ids were hashed"""
+        if PYARROW_AVAILABLE and os.path.exists(self.parquet_file):
+            columns = pq.read_table(self.parquet_file, memory_map=True).to_pydict()
+            documents = {}
+            for doc_id, content, metadata in zip(columns['id'], columns['content'], columns['metadata']):
+                documents[doc_id] = Document(id=doc_id, content=content, metadata=orjson.loads(metadata))
+            positions = columns.get('index_id') or []
+            id_to_index = {
+                doc_id: position for doc_id, position in zip(columns['id'], positions) if position >= 0
+            }
+            return documents, id_to_index
+
+        if os.path.exists(self.metadata_file):
+            with open(self.metadata_file, 'rb') as f:
+                metadata = orjson.loads(f.read())
+
+            # Reconstruct documents (without embeddings for now)
+            documents = {}
+            for doc_id, doc_data in metadata['documents'].items():
+                documents[doc_id] = Document(
+                    id=doc_data['id'],
+                    content=doc_data['content'],
+                    metadata=doc_data['metadata']
+                )
+            return documents, metadata.get('id_to_index', {})
+
+        return None
+
     def _load_index(self):
         """Load existing index from disk"""
         try:
-            if os.path.exists(self.index_file) and os.path.exists(self.metadata_file):
-                # Load FAISS index
-                self.index = faiss.read_index(self.index_file)
-
-                # Load metadata
-                with open(self.metadata_file, 'r') as f:
-                    metadata = json.load(f)
-
-                # Reconstruct documents (without embeddings for now)
-                self.documents = {}
-                for doc_id, doc_data in metadata['documents'].items():
-                    document = Document(
-                        id=doc_data['id'],
-                        content=doc_data['content'],
-                        metadata=doc_data['metadata']
-                    )
-                    self.documents[doc_id] = document
-
-                self.id_to_index = metadata['id_to_index']
+            if not os.path.exists(self.index_file):
+                return
+
+            # Load metadata
+            saved = self._read_metadata()
+            if saved is not None:
+                # Map the FAISS index instead of reading it; pages are faulted in as searches touch them
+                self.index = faiss.read_index(self.index_file, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+                self._index_mmapped = True
+                self._set_nprobe(self.index)
+
+                self.documents, id_to_index = saved
+                self._reset_lookups()
+                self._attach_embeddings()
+                if not isinstance(self.index, faiss.IndexIDMap2):
+                    self._migrate_positional_index(id_to_index)
 
                 logger.info(f"Loaded vector store from {self.index_file}")
                 logger.info(f"Index contains {self.index.ntotal} vectors")
@@ -279,42 +791,91 @@ class VectorStore:
         except Exception as e:
             logger.error(f"Failed to load index: {e}")
             # Initialize empty index
-            self.index = faiss.IndexFlatIP(self.dimension)
+            self.index = self._new_index(0)
+
+    def _migrate_positional_index(self, id_to_index: Dict[str, int]):
+        """Move an index saved with positional rows onto hashed document ids"""
+        legacy_index = self.index
+        try:
+            faiss.extract_index_ivf(legacy_index).make_direct_map()
+        except RuntimeError:
+            pass
+
+        # Reuse the stored vectors; anything that can't be recovered is re-encoded by the rebuild
+        for doc_id, position in id_to_index.items():
+            document = self.documents.get(doc_id)
+            if document is not None and position < legacy_index.ntotal:
+                try:
+                    document.embedding = legacy_index.reconstruct(int(position))
+                except RuntimeError:
+                    pass
+
+        self.rebuild_index()
+        logger.info("Migrated vector index to id-mapped storage")
 
     def get_stats(self) -> Dict:
         """Get statistics about the vector store"""
         return {
             'total_documents': len(self.documents),
-            'index_size': self.index.ntotal,
+            'index_size': self.index.ntotal + self._buffered,
             'dimension': self.dimension,
-            'companies': list(set(doc.metadata.get('company', 'Unknown') for doc in self.documents.values())),
-            'document_types': list(set(doc.metadata.get('type', 'Unknown') for doc in self.documents.values()))
+            'companies': list(self._company_counts),
+            'document_types': list(self._type_counts)
         }
 
+    @_synchronized
     def rebuild_index(self):
         """Rebuild the FAISS index from scratch"""
         logger.info("Rebuilding FAISS index...")
 
-        # Create new index
-        new_index = faiss.IndexFlatIP(self.dimension)
-        new_id_to_index = {}
-
-        # Add all documents back
-        for doc_id, document in self.documents.items():
-            if document.embedding is None:
-                document.embedding = self.embed_text(document.content)
+        # Encode any documents without a stored vector in one batch
+        missing = [document for document in self.documents.values() if document.embedding is None]
+        if missing:
+            for document, embedding in zip(missing, self.embed_text_batch([doc.content for doc in missing])):
+                document.embedding = embedding
+
+        # Gather every embedding into one contiguous matrix
+        xb = np.empty((len(self.documents), self.dimension), dtype=np.float32)
+        for row, document in enumerate(self.documents.values()):
+            xb[row] = document.embedding
+        faiss_ids = np.fromiter(
+            (_faiss_id(doc_id) for doc_id in self.documents), dtype=np.int64, count=len(self.documents)
+        )
 
-            index_id = new_index.ntotal
-            new_index.add(document.embedding.reshape(1, -1))
-            new_id_to_index[doc_id] = index_id
+        # Create new index, training it first if it is quantized
+        new_index = self._new_index(len(xb))
+        if not new_index.is_trained:
+            new_index.train(xb)
+        if len(xb):
+            new_index.add_with_ids(xb, faiss_ids)
 
         # Replace old index
         self.index = new_index
-        self.id_to_index = new_id_to_index
+        self._reset_lookups()
+        self._buffered = 0  # Every buffered document is in the rebuilt index
 
         logger.info("Index rebuild complete")
 
 
+PROMISE_KEYWORDS = ('commit', 'promise', 'pledge', 'value', 'mission', 'vision', 'responsibility')
+
+def _build_promise_automaton() -> ahocorasick.Automaton:
+    """Aho-Corasick automaton over the promise keywords, valued by their bit"""
+    automaton = ahocorasick.Automaton()
+    for bit, keyword in enumerate(PROMISE_KEYWORDS):
+        automaton.add_word(keyword, 1 << bit)
+    automaton.make_automaton()
+    return automaton
+
+_PROMISE_AUTOMATON = _build_promise_automaton()
+
+def _promise_flags(content: str) -> int:
+    """Bitmask of the promise keywords found in content, from one scan"""
+    flags = 0
+    for _, bit in _PROMISE_AUTOMATON.iter(content.lower()):
+        flags |= bit
+    return flags
+
 class CompanyDocumentStore:
     """Specialized store for company documents"""
 
@@ -323,16 +884,30 @@ class CompanyDocumentStore:
 
     def add_company_document(self, company: str, doc_type: str, content: str, source_file: str = "") -> str:
         """Add a company document"""
+        doc_id, metadata = self._document_entry(company, doc_type, content, source_file)
+        return self.vector_store.add_document(doc_id, content, metadata)
+
+    def add_company_documents(self, documents: List[Tuple]) -> List[str]:
+        """Add (company, doc_type, content[, source_file]) tuples in one batch"""
+        batch = []
+        for company, doc_type, content, *rest in documents:
+            doc_id, metadata = self._document_entry(company, doc_type, content, rest[0] if rest else "")
+            batch.append((doc_id, content, metadata))
+        return self.vector_store.add_documents(batch)
+
+    def _document_entry(self, company: str, doc_type: str, content: str, source_file: str) -> Tuple[str, Dict]:
+        """Build the document id and metadata for a company document"""
         doc_id = f"{company}_{doc_type}_{hashlib.md5(content[:100].encode()).hexdigest()[:8]}"
 
         metadata = {
             'company': company,
             'type': doc_type,
             'source_file': source_file,
-            'added_at': str(datetime.now())
+            'added_at': str(datetime.now()),
+            'promise_flags': _promise_flags(content)
         }
 
-        return self.vector_store.add_document(doc_id, content, metadata)
+        return doc_id, metadata
 
     def get_company_promises(self, company: str, query: str = "", limit: int = 5) -> List[Dict]:
         """Get relevant company promises/commitments"""
@@ -344,13 +919,13 @@ class CompanyDocumentStore:
             filter_metadata={'company': company}
         )
 
-        # Filter for promise-related content
-        promise_keywords = ['commit', 'promise', 'pledge', 'value', 'mission', 'vision', 'responsibility']
-
+        # Filter for promise-related content; flags are computed when the document is added
         filtered_results = []
         for result in results:
-            content_lower = result['content'].lower()
-            if any(keyword in content_lower for keyword in promise_keywords):
+            flags = result['metadata'].get('promise_flags')
+            if flags is None:
+                flags = _promise_flags(result['content'])
+            if flags:
                 filtered_results.append(result)
                 if len(filtered_results) >= limit:
                     break
@@ -390,6 +965,11 @@ def test_vector_store():
     for result in results:
         print(f"- {result['id']}: {result['score']:.3f}")
 
+    # Several topics in one batched search
+    topics = ["environmental sustainability", "business ethics", "information access"]
+    for topic, topic_results in zip(topics, store.search_batch(topics, k=1)):
+        print(f"{topic}: {[result['id'] for result in topic_results]}")
+
     # Save index
     store.save_index()
 
@@ -1,7 +1,9 @@
 #!/usr/bin/env python3
 import os
 import time
+import asyncio
 import threading
+import queue
 from hypocrisy_detector import HypocrisyDetector
 from news_monitor import create_breaking_news
 import json
@@ -10,6 +12,12 @@ class HypocrisyDemo:
     def __init__(self):
         self.detector = HypocrisyDetector()
         self.running = False
+        # One loop for the whole session so the async OpenAI client's connections are reused
+        self.loop = asyncio.new_event_loop()
+
+    def run(self, coro):
+        """Run a detector coroutine on the demo's event loop"""
+        return self.loop.run_until_complete(coro)
 
     def setup_demo(self):
         """Setup demo environment"""
@@ -61,7 +69,7 @@ class HypocrisyDemo:
             query = input("What would you like to analyze? (or press Enter for general): ").strip()
 
             print(f"\n🔍 Analyzing {company}...")
-            result = self.detector.analyze_company(company, query)
+            result = self.run(self.detector.analyze_company(company, query))
 
             self.display_analysis_result(result)
 
@@ -112,7 +120,7 @@ class HypocrisyDemo:
         # Show baseline analysis
         print("📊 BASELINE ANALYSIS")
         print("-" * 20)
-        baseline_result = self.detector.analyze_company(company, "environmental policy")
+        baseline_result = self.run(self.detector.analyze_company(company, "environmental policy"))
         self.display_analysis_result(baseline_result)
 
         input("\n🎬 Press Enter to simulate breaking news arrival...")
@@ -131,6 +139,7 @@ class HypocrisyDemo:
         print(f"📄 {breaking_news['content'][:200]}...")
 
         # Create the breaking news file
+        self.detector.news_monitor.clear_arrivals()
         create_breaking_news(
             company=company,
             headline=breaking_news['headline'],
@@ -138,13 +147,17 @@ class HypocrisyDemo:
             severity=breaking_news['severity']
         )
 
-        print(f"\n⏳ Processing new information... (waiting 3 seconds)")
-        time.sleep(3)  # Give time for file processing
+        print(f"\n⏳ Processing new information...")
+        try:
+            # Returns as soon as the monitor has picked up the file
+            self.detector.news_monitor.wait_for_news(timeout=5)
+        except queue.Empty:
+            print("   ⚠️ News file not picked up yet, continuing with current data")
 
         # Show updated analysis
         print("\n📊 UPDATED ANALYSIS")
         print("-" * 20)
-        updated_result = self.detector.analyze_company(company, "environmental policy")
+        updated_result = self.run(self.detector.analyze_company(company, "environmental policy"))
         self.display_analysis_result(updated_result)
 
         print("\n🎯 DEMO IMPACT:")
@@ -174,7 +187,7 @@ class HypocrisyDemo:
         results = []
         for topic in topics:
             print(f"🔍 Analyzing: {topic}")
-            result = self.detector.analyze_company(company, topic)
+            result = self.run(self.detector.analyze_company(company, topic))
             results.append(result)
             print(f"   Result: {result.contradiction_level} (confidence: {result.confidence_score:.2f})")
 
@@ -248,6 +261,8 @@ class HypocrisyDemo:
         """Cleanup demo resources"""
         print("\n🧹 Cleaning up...")
         self.detector.news_monitor.stop_monitoring()
+        self.run(self.detector.close())
+        self.loop.close()
         print("✅ Demo cleanup complete")
 
 def main():
@@ -1,14 +1,47 @@
 import os
 import json
+import asyncio
+import hashlib
+import shelve
+import threading
+from functools import lru_cache
+import ahocorasick
 import PyPDF2
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 import time
 
+SUPPORTED_EXTENSIONS = ('.pdf', '.txt', '.md')
+
+# Keywords to look for promises/commitments
+DEFAULT_PROMISE_KEYWORDS = (
+    'commitment', 'promise', 'pledge', 'value', 'mission', 'vision',
+    'environmental', 'sustainability', 'ethical', 'responsibility',
+    'employee', 'diversity', 'inclusion', 'community'
+)
+
+@lru_cache(maxsize=128)
+def _keyword_automaton(keywords: frozenset) -> ahocorasick.Automaton:
+    """Substring matcher for a lowercased keyword set, compiled once per distinct set"""
+    automaton = ahocorasick.Automaton()
+    for keyword in keywords:
+        automaton.add_word(keyword, keyword)
+    automaton.make_automaton()
+    return automaton
+
+# The default set is known up front, so compile it at import
+_DEFAULT_KEYWORD_SET = frozenset(DEFAULT_PROMISE_KEYWORDS)
+_keyword_automaton(_DEFAULT_KEYWORD_SET)
+
 class DocumentProcessor:
-    def __init__(self, docs_directory="company_documents"):
+    def __init__(self, docs_directory="company_documents", cache_path=".cache/promises"):
         self.docs_directory = docs_directory
         self.processed_docs = {}
+        # Document signature each company's processed_docs entry was built from
+        self._doc_signatures = {}
+        # On-disk cache of extracted promises, valid for as long as the documents are unchanged
+        self.cache_path = cache_path
+        self._cache_lock = threading.Lock()
 
     def extract_pdf_content(self, file_path: str) -> str:
         """Extract text content from PDF file"""
@@ -65,21 +98,63 @@ class DocumentProcessor:
         self.processed_docs[company_id] = documents
         return documents
 
+    def _documents_signature(self, company_id: str) -> Tuple:
+        """(name, mtime, size) of every supported document, used to detect changes without reading them"""
+        company_path = Path(self.docs_directory) / company_id
+        if not company_path.exists():
+            return ()
+
+        signature = []
+        for file_path in company_path.glob("*"):
+            if file_path.is_file() and file_path.suffix.lower() in SUPPORTED_EXTENSIONS:
+                stat = file_path.stat()
+                signature.append((file_path.name, stat.st_mtime_ns, stat.st_size))
+        return tuple(sorted(signature))
+
+    def _promises_cache_key(self, company_id: str, signature: Tuple, keywords: Optional[List[str]]) -> str:
+        """Digest of everything the extracted promises depend on"""
+        keyword_part = ','.join(sorted(keywords)) if keywords else ''
+        raw = f"{company_id}\n{signature!r}\n{keyword_part}"
+        return hashlib.blake2b(raw.encode('utf-8'), digest_size=16).hexdigest()
+
+    def _cache_get(self, key: str) -> Optional[str]:
+        """Read a cached promises string, or None on a miss or unusable cache"""
+        if not Path(self.cache_path).parent.exists():
+            return None
+        try:
+            with self._cache_lock, shelve.open(self.cache_path) as cache:
+                return cache.get(key)
+        except Exception as e:
+            print(f"Promise cache unavailable: {e}")
+            return None
+
+    def _cache_set(self, key: str, value: str):
+        """Store a promises string in the on-disk cache"""
+        try:
+            Path(self.cache_path).parent.mkdir(parents=True, exist_ok=True)
+            with self._cache_lock, shelve.open(self.cache_path) as cache:
+                cache[key] = value
+        except Exception as e:
+            print(f"Could not write promise cache: {e}")
+
     def get_company_promises(self, company_id: str, keywords: List[str] = None) -> str:
         """Extract company promises/commitments from documents"""
-        if company_id not in self.processed_docs:
+        signature = self._documents_signature(company_id)
+        cache_key = self._promises_cache_key(company_id, signature, keywords)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+
+        # Re-read the documents when they changed since they were last processed
+        if company_id not in self.processed_docs or self._doc_signatures.get(company_id) != signature:
             self.process_company_documents(company_id)
+            self._doc_signatures[company_id] = signature
 
         company_docs = self.processed_docs.get(company_id, {})
         promises = []
 
-        # Keywords to look for promises/commitments
-        if not keywords:
-            keywords = [
-                'commitment', 'promise', 'pledge', 'value', 'mission', 'vision',
-                'environmental', 'sustainability', 'ethical', 'responsibility',
-                'employee', 'diversity', 'inclusion', 'community'
-            ]
+        keyword_set = frozenset(keyword.lower() for keyword in keywords if keyword) if keywords else None
+        automaton = _keyword_automaton(keyword_set or _DEFAULT_KEYWORD_SET)
 
         for doc_type, doc_data in company_docs.items():
             content = doc_data['content']
@@ -87,10 +162,17 @@ class DocumentProcessor:
             sentences = content.split('.')
 
             for sentence in sentences:
-                if any(keyword.lower() in sentence.lower() for keyword in keywords):
+                # One pass per sentence instead of lowercasing it again for every keyword
+                if next(automaton.iter(sentence.lower()), None) is not None:
                     promises.append(f"[{doc_type}] {sentence.strip()}")
 
-        return "\n".join(promises[:10])  # Return top 10 relevant sentences
+        result = "\n".join(promises[:10])  # Return top 10 relevant sentences
+        self._cache_set(cache_key, result)
+        return result
+
+    async def aget_company_promises(self, company_id: str, keywords: List[str] = None) -> str:
+        """Async variant of get_company_promises; document reads run on a worker thread"""
+        return await asyncio.to_thread(self.get_company_promises, company_id, keywords)
 
     def create_sample_documents(self):
         """Create sample company documents for demo"""
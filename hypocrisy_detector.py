@@ -1,23 +1,121 @@
 import os
-import json
-from typing import Dict, List, Optional
-from dataclasses import dataclass
+import asyncio
+import hashlib
+import shelve
+import threading
+import re
+from itertools import chain
+from collections import Counter, OrderedDict
+from typing import Dict, List, Literal, Optional, Tuple
+from dataclasses import dataclass, replace
+from pathlib import Path
 import time
+import ahocorasick
+import numpy as np
+from pydantic import BaseModel, Field
 from document_processor import DocumentProcessor
-from news_monitor import NewsMonitor
+from news_monitor import NewsMonitor, keyword_matches
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
 try:
-    from openai import OpenAI
+    import httpx
+    from openai import AsyncOpenAI
     OPENAI_AVAILABLE = True
 except ImportError:
     OPENAI_AVAILABLE = False
     print("OpenAI not available. Install with: pip install openai")
 
-@dataclass
+try:
+    from sentence_transformers import SentenceTransformer
+    SENTENCE_TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    SENTENCE_TRANSFORMERS_AVAILABLE = False
+
+try:
+    import h2  # noqa: F401 - lets httpx negotiate HTTP/2
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+# Cosine similarity above which two queries are treated as the same question
+SEMANTIC_CACHE_THRESHOLD = 0.87
+SEMANTIC_CACHE_SIZE = 256
+
+SENTENCE_MODEL_NAME = 'all-MiniLM-L6-v2'
+EMBEDDING_CACHE_SIZE = 4096
+
+ANALYSIS_MODEL = "gpt-3.5-turbo"
+# Cheaper model for low-stakes calls: structuring prose replies and analyses with no recent news
+SMALL_MODEL = "gpt-4o-mini"
+NO_RECENT_NEWS = "No recent news found"
+
+# Token budget for each of the promises and actions sections of a prompt
+COMPRESS_MAX_TOKENS = 800
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+|\n+')
+
+# Simple keyword extraction (can be enhanced)
+COMMON_THEMES = {
+    'environment': frozenset({'environmental', 'climate', 'carbon', 'green', 'sustainability', 'pollution'}),
+    'employee': frozenset({'employee', 'worker', 'staff', 'diversity', 'inclusion', 'workplace'}),
+    'ethics': frozenset({'ethical', 'integrity', 'honest', 'transparent', 'corruption'}),
+    'social': frozenset({'community', 'social', 'charity', 'volunteer', 'giving'})
+}
+
+_WORD_RE = re.compile(r"[a-z]+")
+
+# Used when the query names no known theme
+DEFAULT_QUERY_KEYWORDS = ('commitment', 'promise', 'value')
+
+# Keywords indicating potential contradictions in the rule-based fallback
+NEGATIVE_KEYWORDS = (
+    'lawsuit', 'fine', 'penalty', 'scandal', 'violation', 'illegal',
+    'layoffs', 'discrimination', 'pollution', 'breach', 'fraud'
+)
+
+POSITIVE_KEYWORDS = (
+    'commitment', 'pledge', 'promise', 'value', 'ethical', 'responsible',
+    'sustainable', 'inclusive', 'transparent'
+)
+
+def _build_signal_automaton() -> ahocorasick.Automaton:
+    """One automaton for both keyword buckets, so each text is scanned in a single pass"""
+    automaton = ahocorasick.Automaton()
+    for bucket, keywords in (('negative', NEGATIVE_KEYWORDS), ('positive', POSITIVE_KEYWORDS)):
+        for keyword in keywords:
+            automaton.add_word(keyword, (bucket, keyword))
+    automaton.make_automaton()
+    return automaton
+
+_SIGNAL_AUTOMATON = _build_signal_automaton()
+
+def _count_signals(text_lower: str) -> Counter:
+    """Number of distinct keywords from each bucket that occur in the text"""
+    found = set(keyword_matches(_SIGNAL_AUTOMATON, text_lower))
+    return Counter(bucket for bucket, _ in found)
+
+# Static across every call and kept first in the message list, so providers that
+# cache prompt prefixes can reuse it
+SYSTEM_PROMPT = """You are an expert corporate analyst specializing in identifying contradictions between company statements and actions. Your job is to objectively assess whether a company's recent actions contradict their stated commitments and values.
+
+For each analysis:
+1. Compare the company's official promises/commitments with their recent actions
+2. Identify any clear contradictions or inconsistencies
+3. Rate the contradiction level as HIGH, MEDIUM, LOW, or NONE
+4. Provide confidence score (0.0 to 1.0)
+5. Give specific examples and explain your reasoning
+
+Be objective and evidence-based. Don't assume malicious intent, but be thorough in identifying genuine contradictions."""
+
+@dataclass(slots=True, frozen=True)
 class ContradictionResult:
     company: str
     query: str
@@ -28,6 +126,208 @@ class ContradictionResult:
     actions_excerpt: str
     timestamp: int
 
+_sentence_model = None
+_sentence_model_failed = not SENTENCE_TRANSFORMERS_AVAILABLE
+_sentence_model_lock = threading.Lock()
+
+def _get_sentence_model():
+    """Shared MiniLM model, loaded on first use; None when sentence-transformers is unavailable"""
+    global _sentence_model, _sentence_model_failed
+    if _sentence_model is None and not _sentence_model_failed:
+        with _sentence_model_lock:
+            if _sentence_model is None and not _sentence_model_failed:
+                try:
+                    _sentence_model = SentenceTransformer(SENTENCE_MODEL_NAME)
+                except Exception as e:
+                    print(f"Sentence embeddings unavailable: {e}")
+                    _sentence_model_failed = True
+    return _sentence_model
+
+_token_encoding = None
+
+def _count_tokens(text: str) -> int:
+    """Prompt tokens for gpt-3.5-turbo, estimated at 4 characters per token without tiktoken"""
+    global _token_encoding
+    if TIKTOKEN_AVAILABLE:
+        if _token_encoding is None:
+            _token_encoding = tiktoken.encoding_for_model(ANALYSIS_MODEL)
+        return len(_token_encoding.encode(text))
+    return len(text) // 4 + 1
+
+class ContradictionSchema(BaseModel):
+    """Shape of one analysis in the model's JSON reply"""
+    contradiction_level: Literal['HIGH', 'MEDIUM', 'LOW', 'NONE']
+    confidence_score: float = Field(ge=0.0, le=1.0)
+    analysis: str
+    key_contradictions: List[str] = []
+
+class CompanyContradictionSchema(ContradictionSchema):
+    company: str = ""
+
+class BatchContradictionSchema(BaseModel):
+    """JSON mode only returns objects, so batch results are wrapped in one"""
+    results: List[CompanyContradictionSchema]
+
+class _JsonObjectTracker:
+    """Incremental brace counter that spots where a streamed top-level JSON object ends"""
+
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.started = False
+
+    def feed(self, chunk: str) -> int:
+        """Index just past the closing brace within chunk, or -1 while the object is still open"""
+        for i, char in enumerate(chunk):
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == '\\':
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char == '{':
+                self.depth += 1
+                self.started = True
+            elif char == '}' and self.started:
+                self.depth -= 1
+                if self.depth == 0:
+                    return i + 1
+        return -1
+
+def _content_hash(text: str) -> str:
+    """Short stable digest used to tie cache entries to the evidence they were built from"""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+class EmbeddingCache:
+    """Normalized sentence embeddings keyed by content hash, kept in an LRU and on disk as float16"""
+
+    def __init__(self, path: str = ".cache/embeddings", max_entries: int = EMBEDDING_CACHE_SIZE):
+        self.path = path
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    def encode(self, texts: List[str]) -> Optional[np.ndarray]:
+        """float32 embeddings for texts, encoding only the ones never seen before; None without a model"""
+        model = _get_sentence_model()
+        if model is None:
+            return None
+
+        keys = [_content_hash(f"{SENTENCE_MODEL_NAME}\n{text}") for text in texts]
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+
+        missing = {key: text for key, text in zip(keys, texts) if key not in found}
+        if missing:
+            found.update(self._load(missing))
+            missing = {key: text for key, text in missing.items() if key not in found}
+
+        if missing:
+            encoded = model.encode(list(missing.values()), normalize_embeddings=True).astype(np.float16)
+            new_entries = dict(zip(missing, encoded))
+            found.update(new_entries)
+            self._store(new_entries)
+
+        with self._lock:
+            for key, embedding in found.items():
+                self._memory[key] = embedding
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+        return np.stack([found[key] for key in keys]).astype(np.float32)
+
+    def _load(self, keys) -> Dict[str, np.ndarray]:
+        """Embeddings persisted by earlier runs"""
+        if not Path(self.path).parent.exists():
+            return {}
+        try:
+            with self._lock, shelve.open(self.path) as cache:
+                return {key: np.frombuffer(cache[key], dtype=np.float16) for key in keys if key in cache}
+        except Exception as e:
+            print(f"Embedding cache unavailable: {e}")
+            return {}
+
+    def _store(self, entries: Dict[str, np.ndarray]):
+        """Persist new embeddings so restarts reuse them"""
+        try:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            with self._lock, shelve.open(self.path) as cache:
+                for key, embedding in entries.items():
+                    cache[key] = embedding.tobytes()
+        except Exception as e:
+            print(f"Could not write embedding cache: {e}")
+
+class SemanticCache:
+    """LRU of analysis results, matched on query meaning for the same company and evidence"""
+
+    def __init__(self, embeddings: EmbeddingCache, threshold: float = SEMANTIC_CACHE_THRESHOLD,
+                 max_entries: int = SEMANTIC_CACHE_SIZE):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.max_entries = max_entries
+        # (company, promises_hash, actions_hash, query) -> (query embedding or None, result)
+        self._entries = OrderedDict()
+        # Lookups run on worker threads while analyses overlap
+        self._lock = threading.Lock()
+
+    def _embed(self, query: str) -> Optional[np.ndarray]:
+        """Normalized MiniLM embedding of the query, or None when no model is available"""
+        embeddings = self.embeddings.encode([query])
+        return None if embeddings is None else embeddings[0]
+
+    def get(self, partition: Tuple[str, str, str], query: str) -> Tuple[Optional[ContradictionResult], Optional[np.ndarray]]:
+        """Return (cached result or None, query embedding to pass back to put)"""
+        key = partition + (query,)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key][1], None
+
+            # Only entries for the same company and unchanged evidence are candidates
+            candidates = [
+                (entry_key, embedding, result) for entry_key, (embedding, result) in self._entries.items()
+                if entry_key[:3] == partition and embedding is not None
+            ]
+        embedding = self._embed(query)
+        if embedding is None or not candidates:
+            return None, embedding
+
+        scores = np.stack([candidate for _, candidate, _ in candidates]) @ embedding
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None, embedding
+
+        best_key, _, result = candidates[best]
+        with self._lock:
+            if best_key in self._entries:
+                self._entries.move_to_end(best_key)
+        return result, embedding
+
+    def put(self, partition: Tuple[str, str, str], query: str, result: ContradictionResult,
+            embedding: Optional[np.ndarray] = None):
+        """Store a result, evicting the least recently used entry when full"""
+        if embedding is None:
+            embedding = self._embed(query)
+        key = partition + (query,)
+        with self._lock:
+            self._entries[key] = (embedding, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every cached result"""
+        with self._lock:
+            self._entries.clear()
+
 class HypocrisyDetector:
     def __init__(self):
         self.document_processor = DocumentProcessor()
@@ -35,72 +335,141 @@ class HypocrisyDetector:
 
         # Initialize OpenAI client if available
         if OPENAI_AVAILABLE and os.getenv('OPENAI_API_KEY'):
-            self.client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+            # One pooled connection set for every analysis; concurrent requests share it
+            http_client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+                timeout=httpx.Timeout(30.0, connect=3.0)
+            )
+            self.client = AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY'), http_client=http_client)
             self.openai_enabled = True
         else:
             self.client = None
             self.openai_enabled = False
             print("⚠️ OpenAI not configured. Using fallback detection.")
 
-        # Cache for analysis results
-        self.analysis_cache = {}
+        # Cache for analysis results, shared by paraphrased queries
+        # Sentence embeddings shared by the semantic cache and prompt compression
+        self.embeddings = EmbeddingCache()
+        self.analysis_cache = SemanticCache(self.embeddings)
 
-    def analyze_company(self, company_id: str, query: str = "") -> ContradictionResult:
+    async def analyze_company(self, company_id: str, query: str = "") -> ContradictionResult:
         """Main method to analyze a company for contradictions"""
-
-        # Get company promises from documents
-        promises = self.document_processor.get_company_promises(
-            company_id,
-            keywords=self._extract_keywords(query) if query else None
-        )
-
-        # Get recent company news/actions
-        recent_news = self.news_monitor.get_company_news(company_id, hours_back=168)  # 1 week
-        actions = self._format_news_for_analysis(recent_news)
+        promises, actions = await self._gather_evidence(company_id, query)
 
         if not promises and not actions:
-            return ContradictionResult(
-                company=company_id,
-                query=query,
-                contradiction_level="UNKNOWN",
-                confidence_score=0.0,
-                analysis="No data available for analysis",
-                promises_excerpt="No promises found",
-                actions_excerpt="No recent actions found",
-                timestamp=int(time.time())
-            )
+            return self._no_data_result(company_id, query)
 
         # Perform contradiction analysis
         if self.openai_enabled:
-            result = self._analyze_with_openai(company_id, query, promises, actions)
+            partition = (company_id, _content_hash(promises), _content_hash(actions))
+            # Embedding the query is CPU-bound; keep it off the event loop
+            cached, embedding = await asyncio.to_thread(self.analysis_cache.get, partition, query)
+            if cached is not None:
+                return replace(cached, query=query)
+
+            result = await self._analyze_with_openai(company_id, query, promises, actions)
+            if result is None:
+                # Don't cache the rule-based stand-in; the next call should retry the model
+                result = self._analyze_with_fallback(company_id, query, promises, actions)
+            else:
+                await asyncio.to_thread(self.analysis_cache.put, partition, query, result, embedding)
         else:
             result = self._analyze_with_fallback(company_id, query, promises, actions)
 
         return result
 
+    async def analyze_many(self, company_ids: List[str], query: str = "") -> List[ContradictionResult]:
+        """Analyze several companies concurrently, one OpenAI request each"""
+        return list(await asyncio.gather(*(self.analyze_company(company_id, query) for company_id in company_ids)))
+
+    async def analyze_companies(self, company_ids: List[str], query: str = "") -> List[ContradictionResult]:
+        """Analyze several companies for the same query with a single OpenAI request"""
+        results: List[Optional[ContradictionResult]] = [None] * len(company_ids)
+        pending = []
+
+        evidence = await asyncio.gather(*(self._gather_evidence(company_id, query) for company_id in company_ids))
+        for i, (company_id, (promises, actions)) in enumerate(zip(company_ids, evidence)):
+            if not promises and not actions:
+                results[i] = self._no_data_result(company_id, query)
+                continue
+
+            if not self.openai_enabled:
+                results[i] = self._analyze_with_fallback(company_id, query, promises, actions)
+                continue
+
+            partition = (company_id, _content_hash(promises), _content_hash(actions))
+            cached, embedding = await asyncio.to_thread(self.analysis_cache.get, partition, query)
+            if cached is not None:
+                results[i] = replace(cached, query=query)
+            else:
+                pending.append((i, company_id, promises, actions, partition, embedding))
+
+        if len(pending) > 1:
+            batch = await self._analyze_batch_with_openai(
+                query, [(company_id, promises, actions) for _, company_id, promises, actions, _, _ in pending]
+            )
+        else:
+            batch = None
+
+        if not batch:
+            # Per-company requests, overlapped, when there is nothing to batch or the batch could not be parsed
+            batch = await asyncio.gather(*(
+                self._analyze_with_openai(company_id, query, promises, actions)
+                for _, company_id, promises, actions, _, _ in pending
+            ))
+
+        for (i, company_id, promises, actions, partition, embedding), result in zip(pending, batch):
+            if result is None:
+                results[i] = self._analyze_with_fallback(company_id, query, promises, actions)
+                continue
+            await asyncio.to_thread(self.analysis_cache.put, partition, query, result, embedding)
+            results[i] = result
+
+        return results
+
+    async def _gather_evidence(self, company_id: str, query: str) -> Tuple[str, str]:
+        """Collect the promises and formatted recent actions a company is analyzed against"""
+        # Company promises from documents and recent news/actions (1 week), fetched together
+        promises, recent_news = await asyncio.gather(
+            self.document_processor.aget_company_promises(
+                company_id,
+                keywords=self._extract_keywords(query) if query else None
+            ),
+            self.news_monitor.aget_company_news(company_id, hours_back=168)
+        )
+        actions = self._format_news_for_analysis(recent_news)
+        return promises, actions
+
+    def _no_data_result(self, company_id: str, query: str) -> ContradictionResult:
+        """Result for a company with neither promises nor actions to compare"""
+        return ContradictionResult(
+            company=company_id,
+            query=query,
+            contradiction_level="UNKNOWN",
+            confidence_score=0.0,
+            analysis="No data available for analysis",
+            promises_excerpt="No promises found",
+            actions_excerpt="No recent actions found",
+            timestamp=int(time.time())
+        )
+
     def _extract_keywords(self, query: str) -> List[str]:
         """Extract relevant keywords from user query"""
-        # Simple keyword extraction (can be enhanced)
-        common_themes = {
-            'environment': ['environmental', 'climate', 'carbon', 'green', 'sustainability', 'pollution'],
-            'employee': ['employee', 'worker', 'staff', 'diversity', 'inclusion', 'workplace'],
-            'ethics': ['ethical', 'integrity', 'honest', 'transparent', 'corruption'],
-            'social': ['community', 'social', 'charity', 'volunteer', 'giving']
-        }
-
-        query_lower = query.lower()
-        keywords = []
+        # Tokenize once; whole-word set intersection instead of substring scans per theme
+        query_tokens = frozenset(_WORD_RE.findall(query.lower()))
+        # Also accept simple plurals ("workers" -> "worker")
+        query_tokens |= {token[:-1] for token in query_tokens if token.endswith('s')}
 
-        for theme, theme_keywords in common_themes.items():
-            if any(word in query_lower for word in theme_keywords):
-                keywords.extend(theme_keywords)
+        matched = [words for words in COMMON_THEMES.values() if words & query_tokens]
+        keywords = sorted(set(chain.from_iterable(matched)))
 
-        return keywords if keywords else ['commitment', 'promise', 'value']
+        return keywords if keywords else list(DEFAULT_QUERY_KEYWORDS)
 
     def _format_news_for_analysis(self, news_items: List[Dict]) -> str:
         """Format news items for analysis"""
         if not news_items:
-            return "No recent news found"
+            return NO_RECENT_NEWS
 
         formatted = []
         for item in news_items[:5]:  # Top 5 most recent
@@ -111,29 +480,51 @@ class HypocrisyDetector:
 
         return "\n".join(formatted)
 
-    def _analyze_with_openai(self, company_id: str, query: str, promises: str, actions: str) -> ContradictionResult:
-        """Analyze contradictions using OpenAI"""
-
-        system_prompt = """You are an expert corporate analyst specializing in identifying contradictions between company statements and actions. Your job is to objectively assess whether a company's recent actions contradict their stated commitments and values.
-
-For each analysis:
-1. Compare the company's official promises/commitments with their recent actions
-2. Identify any clear contradictions or inconsistencies
-3. Rate the contradiction level as HIGH, MEDIUM, LOW, or NONE
-4. Provide confidence score (0.0 to 1.0)
-5. Give specific examples and explain your reasoning
-
-Be objective and evidence-based. Don't assume malicious intent, but be thorough in identifying genuine contradictions."""
+    def _compress(self, text: str, query: str, max_tokens: int = COMPRESS_MAX_TOKENS) -> str:
+        """Keep the sentences most relevant to the query that fit in max_tokens, in original order"""
+        if _count_tokens(text) <= max_tokens:
+            return text
+
+        sentences = [sentence.strip() for sentence in _SENTENCE_SPLIT_RE.split(text) if sentence.strip()]
+        # Unchanged promise sentences hit the embedding cache across calls and restarts
+        embeddings = self.embeddings.encode([query or "General corporate behavior"] + sentences)
+        if embeddings is None:
+            # No ranking available; keep the leading sentences
+            ranked = range(len(sentences))
+        else:
+            ranked = np.argsort(-(embeddings[1:] @ embeddings[0]), kind='stable')
+
+        kept = []
+        budget = max_tokens
+        for i in ranked:
+            cost = _count_tokens(sentences[i]) + 1
+            if cost <= budget:
+                kept.append(i)
+                budget -= cost
+
+        return "\n".join(sentences[i] for i in sorted(kept))
+
+    async def _compress_evidence(self, query: str, promises: str, actions: str) -> Tuple[str, str]:
+        """Compress both prompt sections off the event loop"""
+        return tuple(await asyncio.gather(
+            asyncio.to_thread(self._compress, promises, query),
+            asyncio.to_thread(self._compress, actions, query)
+        ))
+
+    async def _analyze_with_openai(self, company_id: str, query: str, promises: str,
+                                   actions: str) -> Optional[ContradictionResult]:
+        """Analyze contradictions using OpenAI; None if the request or its reply failed"""
+        promises_prompt, actions_prompt = await self._compress_evidence(query, promises, actions)
 
         user_prompt = f"""Analyze {company_id} for contradictions between promises and actions:
 
 QUERY FOCUS: {query if query else "General corporate behavior"}
 
 OFFICIAL COMPANY COMMITMENTS:
-{promises}
+{promises_prompt}
 
 RECENT COMPANY ACTIONS:
-{actions}
+{actions_prompt}
 
 Please provide:
 1. Contradiction level (NONE/LOW/MEDIUM/HIGH)
@@ -150,96 +541,134 @@ Format your response as JSON:
 }}"""
 
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
+            response = await self.client.chat.completions.create(
+                # Without recent actions there is little to weigh; the small model is enough
+                model=SMALL_MODEL if actions == NO_RECENT_NEWS else ANALYSIS_MODEL,
                 messages=[
-                    {"role": "system", "content": system_prompt},
+                    {"role": "system", "content": SYSTEM_PROMPT},
                     {"role": "user", "content": user_prompt}
                 ],
                 temperature=0.3,
-                max_tokens=1000
+                max_tokens=1000,
+                # JSON mode guarantees a parseable object; the schema checks its fields
+                response_format={"type": "json_object"},
+                stream=True
             )
 
-            # Parse response
-            response_text = response.choices[0].message.content
-
-            # Try to extract JSON from response
+            # Stop reading as soon as the top-level object closes; anything after it is discarded
+            tracker = _JsonObjectTracker()
+            parts = []
             try:
-                # Find JSON in response
-                start_idx = response_text.find('{')
-                end_idx = response_text.rfind('}') + 1
-                if start_idx != -1 and end_idx != -1:
-                    json_str = response_text[start_idx:end_idx]
-                    result_data = json.loads(json_str)
-                else:
-                    raise ValueError("No JSON found in response")
-
-            except (json.JSONDecodeError, ValueError):
-                # Fallback: parse response manually
-                result_data = self._parse_openai_response(response_text)
-
-            return ContradictionResult(
-                company=company_id,
-                query=query,
-                contradiction_level=result_data.get('contradiction_level', 'UNKNOWN'),
-                confidence_score=result_data.get('confidence_score', 0.5),
-                analysis=result_data.get('analysis', response_text),
-                promises_excerpt=promises[:500] + "..." if len(promises) > 500 else promises,
-                actions_excerpt=actions[:500] + "..." if len(actions) > 500 else actions,
-                timestamp=int(time.time())
-            )
+                async for chunk in response:
+                    if not chunk.choices or not chunk.choices[0].delta.content:
+                        continue
+                    content = chunk.choices[0].delta.content
+                    end = tracker.feed(content)
+                    if end != -1:
+                        parts.append(content[:end])
+                        break
+                    parts.append(content)
+            finally:
+                await response.close()
+
+            result_data = ContradictionSchema.model_validate_json("".join(parts))
+            return self._result_from_data(company_id, query, result_data, promises, actions)
 
         except Exception as e:
             print(f"OpenAI analysis failed: {e}")
-            return self._analyze_with_fallback(company_id, query, promises, actions)
-
-    def _parse_openai_response(self, response: str) -> Dict:
-        """Fallback parser for OpenAI response"""
-        # Simple keyword-based parsing
-        response_lower = response.lower()
-
-        # Determine contradiction level
-        if 'high' in response_lower and 'contradiction' in response_lower:
-            level = 'HIGH'
-            confidence = 0.8
-        elif 'medium' in response_lower and 'contradiction' in response_lower:
-            level = 'MEDIUM'
-            confidence = 0.6
-        elif 'low' in response_lower and 'contradiction' in response_lower:
-            level = 'LOW'
-            confidence = 0.4
-        else:
-            level = 'NONE'
-            confidence = 0.2
+            return None
 
-        return {
-            'contradiction_level': level,
-            'confidence_score': confidence,
-            'analysis': response
-        }
+    async def _analyze_batch_with_openai(self, query: str,
+                                   companies: List[Tuple[str, str, str]]) -> Optional[List[ContradictionResult]]:
+        """Analyze (company, promises, actions) blocks in one request; None if the reply is unusable"""
+        compressed = await asyncio.gather(*(
+            self._compress_evidence(query, promises, actions) for _, promises, actions in companies
+        ))
 
-    def _analyze_with_fallback(self, company_id: str, query: str, promises: str, actions: str) -> ContradictionResult:
-        """Simple rule-based fallback analysis"""
+        blocks = []
+        for n, ((company_id, _, _), (promises_prompt, actions_prompt)) in enumerate(zip(companies, compressed), 1):
+            blocks.append(f"""COMPANY {n}: {company_id}
+
+OFFICIAL COMPANY COMMITMENTS:
+{promises_prompt}
+
+RECENT COMPANY ACTIONS:
+{actions_prompt}""")
+        company_blocks = "\n\n".join(blocks)
+
+        user_prompt = f"""Analyze each of the following {len(companies)} companies for contradictions between promises and actions. Analyze every company independently, using only its own evidence.
 
-        # Keywords indicating potential contradictions
-        negative_keywords = [
-            'lawsuit', 'fine', 'penalty', 'scandal', 'violation', 'illegal',
-            'layoffs', 'discrimination', 'pollution', 'breach', 'fraud'
-        ]
+QUERY FOCUS: {query if query else "General corporate behavior"}
+
+{company_blocks}
+
+Return a JSON object whose "results" array has exactly one object per company, in the same order as listed above:
+{{
+    "results": [
+        {{
+            "company": "Company name as listed",
+            "contradiction_level": "HIGH/MEDIUM/LOW/NONE",
+            "confidence_score": 0.85,
+            "analysis": "Detailed explanation...",
+            "key_contradictions": ["contradiction 1", "contradiction 2"]
+        }}
+    ]
+}}"""
+
+        try:
+            response = await self.client.chat.completions.create(
+                model=ANALYSIS_MODEL,
+                messages=[
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": user_prompt}
+                ],
+                temperature=0.3,
+                max_tokens=min(4000, 1000 * len(companies)),
+                response_format={"type": "json_object"}
+            )
+            self._log_usage(response)
 
-        positive_keywords = [
-            'commitment', 'pledge', 'promise', 'value', 'ethical', 'responsible',
-            'sustainable', 'inclusive', 'transparent'
-        ]
+            items = BatchContradictionSchema.model_validate_json(response.choices[0].message.content).results
+            if len(items) != len(companies):
+                raise ValueError(f"Expected {len(companies)} results, got {len(items)}")
 
-        actions_lower = actions.lower()
-        promises_lower = promises.lower()
+            return [
+                self._result_from_data(company_id, query, result_data, promises, actions)
+                for (company_id, promises, actions), result_data in zip(companies, items)
+            ]
 
-        # Count negative signals in actions
-        negative_signals = sum(1 for keyword in negative_keywords if keyword in actions_lower)
+        except Exception as e:
+            print(f"Batch OpenAI analysis failed, analyzing companies one by one: {e}")
+            return None
+
+    def _log_usage(self, response):
+        """Print prompt token usage, including the share served from OpenAI's prompt cache"""
+        usage = getattr(response, 'usage', None)
+        details = getattr(usage, 'prompt_tokens_details', None)
+        if usage is not None:
+            cached_tokens = getattr(details, 'cached_tokens', 0) or 0
+            print(f"OpenAI prompt tokens: {usage.prompt_tokens} ({cached_tokens} cached)")
+
+    def _result_from_data(self, company_id: str, query: str, result_data: ContradictionSchema,
+                          promises: str, actions: str) -> ContradictionResult:
+        """Build a ContradictionResult from a validated model reply"""
+        return ContradictionResult(
+            company=company_id,
+            query=query,
+            contradiction_level=result_data.contradiction_level,
+            confidence_score=result_data.confidence_score,
+            analysis=result_data.analysis,
+            promises_excerpt=promises[:500] + "..." if len(promises) > 500 else promises,
+            actions_excerpt=actions[:500] + "..." if len(actions) > 500 else actions,
+            timestamp=int(time.time())
+        )
+
+    def _analyze_with_fallback(self, company_id: str, query: str, promises: str, actions: str) -> ContradictionResult:
+        """Simple rule-based fallback analysis"""
 
-        # Count positive signals in promises
-        positive_signals = sum(1 for keyword in positive_keywords if keyword in promises_lower)
+        # Count negative signals in actions and positive signals in promises
+        negative_signals = _count_signals(actions.lower())['negative']
+        positive_signals = _count_signals(promises.lower())['positive']
 
         # Simple contradiction scoring
         if negative_signals > 0 and positive_signals > 0:
@@ -271,6 +700,11 @@ Format your response as JSON:
             timestamp=int(time.time())
         )
 
+    async def close(self):
+        """Close the OpenAI client's connection pool"""
+        if self.client is not None:
+            await self.client.close()
+
     def setup_demo_data(self):
         """Setup demo data for presentation"""
         # Create sample documents
@@ -287,7 +721,7 @@ if __name__ == "__main__":
     detector.setup_demo_data()
 
     # Analyze TechCorp
-    result = detector.analyze_company("TechCorp", "employee treatment")
+    result = asyncio.run(detector.analyze_company("TechCorp", "employee treatment"))
 
     print(f"\n🔍 Analysis Results for TechCorp:")
     print(f"Contradiction Level: {result.contradiction_level}")
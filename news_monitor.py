@@ -1,47 +1,141 @@
 import os
-import json
+import orjson
+import re
+import sqlite3
+import sys
 import time
 from pathlib import Path
-from watchdog.observers import Observer
+from watchdog.observers.polling import PollingObserver
 from watchdog.events import FileSystemEventHandler
 from typing import Dict, List, Callable
 import threading
+import queue
+import asyncio
+import ahocorasick
+
+HIGH_SEVERITY_KEYWORDS = (
+    'lawsuit', 'fine', 'penalty', 'scandal', 'violation', 'illegal',
+    'fraud', 'discrimination', 'harassment', 'breach', 'investigation'
+)
+
+MEDIUM_SEVERITY_KEYWORDS = (
+    'layoffs', 'closure', 'complaint', 'criticism', 'controversy',
+    'dispute', 'delay', 'problem', 'issue'
+)
+
+def _build_severity_automaton() -> ahocorasick.Automaton:
+    """Compile both severity tiers into one automaton so content is scanned once"""
+    automaton = ahocorasick.Automaton()
+    for severity, keywords in (('HIGH', HIGH_SEVERITY_KEYWORDS), ('MEDIUM', MEDIUM_SEVERITY_KEYWORDS)):
+        for keyword in keywords:
+            automaton.add_word(keyword, (severity, keyword))
+    automaton.make_automaton()
+    return automaton
+
+_SEVERITY_AUTOMATON = _build_severity_automaton()
+
+# Optional inflection after a keyword, so 'fined' and 'lawsuits' count but 'define' and 'finest' do not
+_KEYWORD_END_RE = re.compile(r'(?:s|es|d|ed|ing)?\b')
+
+def keyword_matches(automaton: ahocorasick.Automaton, text_lower: str):
+    """Yield the (bucket, keyword) values of whole-word keyword hits, in text order"""
+    for end, value in automaton.iter(text_lower):
+        start = end - len(value[1]) + 1
+        if start > 0 and (text_lower[start - 1].isalnum() or text_lower[start - 1] == '_'):
+            continue
+        if not _KEYWORD_END_RE.match(text_lower, end + 1):
+            continue
+        yield value
+
+# How long the ingest worker lets events coalesce, and how long a file's size must hold still
+INGEST_BATCH_WINDOW = 0.05
+STABILITY_CHECK_INTERVAL = 0.02
+# Stability rounds before a file that keeps changing is processed anyway
+MAX_STABILITY_ROUNDS = 50
+
+# Poll interval if native change notification is unavailable
+POLLING_INTERVAL = 0.25
+
+def _native_observer_class():
+    """watchdog observer backed by this platform's change notification API"""
+    try:
+        if sys.platform.startswith('linux'):
+            from watchdog.observers.inotify import InotifyObserver as observer_class
+        elif sys.platform == 'darwin':
+            from watchdog.observers.fsevents import FSEventsObserver as observer_class
+        elif sys.platform == 'win32':
+            from watchdog.observers.read_directory_changes import WindowsApiObserver as observer_class
+        else:
+            from watchdog.observers.kqueue import KqueueObserver as observer_class
+    except ImportError:
+        return None
+    return observer_class
 
 class NewsFileHandler(FileSystemEventHandler):
-    def __init__(self, callback: Callable):
-        self.callback = callback
+    def __init__(self, pending: queue.Queue):
+        self.pending = pending
 
     def on_created(self, event):
         if not event.is_directory and event.src_path.endswith('.json'):
-            # Small delay to ensure file is fully written
-            time.sleep(0.1)
-            self.callback(event.src_path)
+            # Hand off to the ingest worker; never block the observer thread
+            self.pending.put(event.src_path)
 
 class NewsMonitor:
-    def __init__(self, news_directory="live_news_feed"):
+    def __init__(self, news_directory="live_news_feed", db_path=None):
         self.news_directory = news_directory
         self.observer = None
+        self._pending_files = queue.Queue()
+        self._ingest_thread = None
         self.news_items = []
         self.callbacks = []
+        # Processed news items, for callers that want to block until something arrives
+        self.arrivals = queue.Queue()
 
         # Ensure directory exists
         Path(self.news_directory).mkdir(parents=True, exist_ok=True)
 
+        # Indexed store behind get_company_news; written by the ingest worker, read by callers
+        self.db_path = db_path or str(Path(self.news_directory) / "news.db")
+        self.db = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+        self._db_lock = threading.Lock()
+        self._init_db()
+
+    def _init_db(self):
+        """Create the news table and its company/time index"""
+        with self._db_lock:
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA synchronous=NORMAL")
+            self.db.execute("""
+                CREATE TABLE IF NOT EXISTS news (
+                    id INTEGER PRIMARY KEY,
+                    company TEXT NOT NULL,
+                    timestamp INTEGER NOT NULL,
+                    source_file TEXT UNIQUE,
+                    payload BLOB NOT NULL
+                )
+            """)
+            self.db.execute("CREATE INDEX IF NOT EXISTS idx_company_ts ON news(company, timestamp DESC)")
+
     def add_callback(self, callback: Callable):
         """Add callback function to be called when new news arrives"""
         self.callbacks.append(callback)
 
-    def process_news_file(self, file_path: str):
-        """Process a new news file"""
+    def process_news_file(self, file_path: str, final: bool = True) -> bool:
+        """Process a new news file; returns False if it is not complete JSON yet and final is not set"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                news_data = json.load(f)
+            with open(file_path, 'rb') as f:
+                try:
+                    news_data = orjson.loads(f.read())
+                except orjson.JSONDecodeError:
+                    if not final:
+                        return False
+                    raise
 
-            # Validate required fields
+            # Validate required fields; the file is complete, so it is rejected rather than retried
             required_fields = ['company', 'headline', 'content']
-            if not all(field in news_data for field in required_fields):
+            if not isinstance(news_data, dict) or not all(field in news_data for field in required_fields):
                 print(f"Invalid news file format: {file_path}")
-                return
+                return True
 
             # Add timestamp if not present
             if 'timestamp' not in news_data:
@@ -51,7 +145,7 @@ class NewsMonitor:
             if 'severity' not in news_data:
                 news_data['severity'] = self.assess_severity(news_data['content'])
 
-            self.news_items.append(news_data)
+            self._add_item(news_data, file_path)
             print(f"📰 New news processed: {news_data['headline']}")
 
             # Call all registered callbacks
@@ -61,57 +155,146 @@ class NewsMonitor:
                 except Exception as e:
                     print(f"Error in callback: {e}")
 
+            self.arrivals.put(news_data)
+
         except Exception as e:
             print(f"Error processing news file {file_path}: {e}")
+        return True
 
-    def assess_severity(self, content: str) -> str:
-        """Simple severity assessment based on keywords"""
-        high_severity_keywords = [
-            'lawsuit', 'fine', 'penalty', 'scandal', 'violation', 'illegal',
-            'fraud', 'discrimination', 'harassment', 'breach', 'investigation'
-        ]
+    def wait_for_news(self, timeout: float = None) -> Dict:
+        """Block until the next news item has been processed; raises queue.Empty on timeout"""
+        return self.arrivals.get(timeout=timeout)
 
-        medium_severity_keywords = [
-            'layoffs', 'closure', 'complaint', 'criticism', 'controversy',
-            'dispute', 'delay', 'problem', 'issue'
-        ]
-
-        content_lower = content.lower()
+    def clear_arrivals(self):
+        """Discard processed items nobody has waited for yet"""
+        while True:
+            try:
+                self.arrivals.get_nowait()
+            except queue.Empty:
+                return
 
-        if any(keyword in content_lower for keyword in high_severity_keywords):
-            return "HIGH"
-        elif any(keyword in content_lower for keyword in medium_severity_keywords):
-            return "MEDIUM"
-        else:
-            return "LOW"
+    def assess_severity(self, content: str) -> str:
+        """Simple severity assessment based on keywords"""
+        severity = "LOW"
+        for tier, _ in keyword_matches(_SEVERITY_AUTOMATON, content.lower()):
+            if tier == "HIGH":
+                return "HIGH"
+            severity = "MEDIUM"
+        return severity
 
     def start_monitoring(self):
         """Start monitoring the news directory for new files"""
-        event_handler = NewsFileHandler(self.process_news_file)
-        self.observer = Observer()
-        self.observer.schedule(event_handler, self.news_directory, recursive=False)
-        self.observer.start()
+        self._ingest_thread = threading.Thread(target=self._ingest_loop, daemon=True)
+        self._ingest_thread.start()
+
+        event_handler = NewsFileHandler(self._pending_files)
+        observer_class = _native_observer_class()
+        try:
+            if observer_class is None:
+                raise OSError("no native file watcher for this platform")
+            self.observer = observer_class()
+            self.observer.schedule(event_handler, self.news_directory, recursive=False)
+            self.observer.start()
+        except OSError as e:
+            # e.g. inotify watch limit reached; polling is slower but always works
+            print(f"Native file watching unavailable ({e}), polling every {POLLING_INTERVAL}s")
+            self.observer = PollingObserver(timeout=POLLING_INTERVAL)
+            self.observer.schedule(event_handler, self.news_directory, recursive=False)
+            self.observer.start()
         print(f"📁 Started monitoring {self.news_directory} for news files...")
 
+    def _ingest_loop(self):
+        """Process files queued by the observer in batches once their size stops changing"""
+        waiting = {}  # path -> stability rounds so far
+        running = True
+        while running:
+            for path in self._drain_pending(block=not waiting):
+                if path is None:
+                    running = False
+                else:
+                    waiting.setdefault(path, 0)
+            if not waiting:
+                continue
+
+            # One shared interval for the whole batch instead of a sleep per file
+            before = {path: self._file_size(path) for path in waiting}
+            time.sleep(STABILITY_CHECK_INTERVAL)
+            for path, size in before.items():
+                waiting[path] += 1
+                if size is None:
+                    # Removed before it could be read
+                    del waiting[path]
+                    continue
+
+                # Out of rounds, or shutting down: process whatever is there
+                final = waiting[path] >= MAX_STABILITY_ROUNDS or not running
+                settled = size > 0 and self._file_size(path) == size
+                # A writer that paused mid-file leaves truncated JSON; keep waiting for the rest
+                if (settled or final) and self.process_news_file(path, final=final):
+                    del waiting[path]
+
+    def _drain_pending(self, block: bool) -> List:
+        """Collect every queued path, waiting for the first one only when block is set"""
+        paths = []
+        try:
+            if block:
+                paths.append(self._pending_files.get())
+                # Let a burst of events coalesce into one batch
+                time.sleep(INGEST_BATCH_WINDOW)
+            while True:
+                paths.append(self._pending_files.get_nowait())
+        except queue.Empty:
+            pass
+        return paths
+
+    def _file_size(self, path: str):
+        """Current size of a file, or None if it no longer exists"""
+        try:
+            return os.stat(path).st_size
+        except OSError:
+            return None
+
     def stop_monitoring(self):
         """Stop monitoring"""
         if self.observer:
             self.observer.stop()
             self.observer.join()
+            self._pending_files.put(None)
+            if self._ingest_thread:
+                self._ingest_thread.join(timeout=5)
             print("Stopped monitoring news directory")
 
     def get_company_news(self, company_id: str, hours_back: int = 24) -> List[Dict]:
         """Get recent news for a specific company"""
         cutoff_time = time.time() - (hours_back * 3600)
 
-        company_news = [
-            item for item in self.news_items
-            if item.get('company', '').lower() == company_id.lower()
-            and item.get('timestamp', 0) > cutoff_time
-        ]
-
-        # Sort by timestamp, newest first
-        return sorted(company_news, key=lambda x: x.get('timestamp', 0), reverse=True)
+        # Newest first; id keeps arrival order among items with the same timestamp
+        with self._db_lock:
+            rows = self.db.execute(
+                "SELECT payload FROM news WHERE company = ? AND timestamp > ? ORDER BY timestamp DESC, id",
+                (company_id.lower(), cutoff_time)
+            ).fetchall()
+        return [orjson.loads(payload) for (payload,) in rows]
+
+    def _add_item(self, news_data: Dict, source_file: str = None):
+        """Append an item to news_items and store it; a file seen again replaces its earlier row"""
+        self.news_items.append(news_data)
+        with self._db_lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO news (company, timestamp, source_file, payload) VALUES (?, ?, ?, ?)",
+                (
+                    # Lowercased once here so lookups hit the index directly
+                    news_data.get('company', '').lower(),
+                    int(news_data.get('timestamp', 0)),
+                    os.path.abspath(source_file) if source_file else None,
+                    orjson.dumps(news_data)
+                )
+            )
+
+    async def aget_company_news(self, company_id: str, hours_back: int = 24) -> List[Dict]:
+        """Async variant of get_company_news for use alongside other awaited lookups"""
+        # Indexed query, but still disk I/O; keep it off the event loop
+        return await asyncio.to_thread(self.get_company_news, company_id, hours_back)
 
     def create_sample_news(self):
         """Create sample news files for demo"""
@@ -136,8 +319,9 @@ class NewsMonitor:
 
         for i, news in enumerate(sample_news):
             file_path = Path(self.news_directory) / f"sample_news_{i}.json"
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(news, f, indent=2)
+            file_path.write_bytes(orjson.dumps(news, option=orjson.OPT_INDENT_2))
+            # Also straight into the store, keyed by the same file so a watcher event doesn't duplicate it
+            self._add_item(news, str(file_path))
 
         print(f"Created {len(sample_news)} sample news files")
 
@@ -153,8 +337,7 @@ def create_breaking_news(company: str, headline: str, content: str, severity: st
     }
 
     file_path = Path("live_news_feed") / f"breaking_{int(time.time())}.json"
-    with open(file_path, 'w', encoding='utf-8') as f:
-        json.dump(news_data, f, indent=2)
+    file_path.write_bytes(orjson.dumps(news_data, option=orjson.OPT_INDENT_2))
 
     print(f"🚨 Breaking news created: {headline}")
 
@@ -0,0 +1,38 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("watchdog")
+pytest.importorskip("ahocorasick")
+orjson = pytest.importorskip("orjson")
+
+from news_monitor import NewsMonitor, STABILITY_CHECK_INTERVAL
+
+
+@pytest.mark.parametrize("payload", [{"headline": "missing company and content"}, ["not", "an", "object"]])
+def test_invalid_news_file_leaves_ingest_queue(tmp_path, payload):
+    monitor = NewsMonitor(news_directory=str(tmp_path / "feed"))
+    path = tmp_path / "feed" / "invalid.json"
+    path.write_bytes(orjson.dumps(payload))
+
+    calls = []
+    process = monitor.process_news_file
+
+    def counting_process(file_path, final=True):
+        calls.append(file_path)
+        return process(file_path, final=final)
+
+    monitor.process_news_file = counting_process
+    worker = threading.Thread(target=monitor._ingest_loop, daemon=True)
+    worker.start()
+    monitor._pending_files.put(str(path))
+
+    # Give the worker many stability rounds; a rejected file must be processed exactly once
+    time.sleep(STABILITY_CHECK_INTERVAL * 20 + 0.2)
+    assert calls == [str(path)]
+    assert monitor.news_items == []
+
+    monitor._pending_files.put(None)
+    worker.join(timeout=5)
+    assert not worker.is_alive()